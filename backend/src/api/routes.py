@@ -1,15 +1,20 @@
 from fastapi import FastAPI, UploadFile, File, Form, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, HTMLResponse
-from typing import List, Optional, Dict
+from fastapi.responses import ORJSONResponse, HTMLResponse
+from typing import Any, List, Optional, Dict, Tuple
 import asyncio
-import json
+import base64
+import functools
 import logging
 import os
+import struct
 import tempfile
 import time
+import uuid
 import numpy as np
 import cv2
+import orjson
+import torch
 
 logger = logging.getLogger(__name__)
 
@@ -18,9 +23,10 @@ try:
     from ..services.tracking_service import TrackingService
     from ..services.youtube_service import YouTubeService
     from ..services.video_analysis_service import VideoAnalysisService
-    from ..models.detector_factory import ModelType
+    from ..models.detector_factory import DetectorFactory, ModelType
     from ..models.pose_estimator import MediaPipePoseDetector
     from ..models.exercise_analyzer import ExerciseAnalyzerFactory, ExerciseType
+    from ..utils import pose_geometry
     from .schemas import (
         TrackingRequest, TrackingResponse, ModelInfo, 
         DeviceInfo, SessionStats, ExerciseTrackingRequest,
@@ -31,9 +37,10 @@ except ImportError:
     from services.tracking_service import TrackingService
     from services.youtube_service import YouTubeService
     from services.video_analysis_service import VideoAnalysisService
-    from models.detector_factory import ModelType
+    from models.detector_factory import DetectorFactory, ModelType
     from models.pose_estimator import MediaPipePoseDetector
     from models.exercise_analyzer import ExerciseAnalyzerFactory, ExerciseType
+    from utils import pose_geometry
     from api.schemas import (
         TrackingRequest, TrackingResponse, ModelInfo, 
         DeviceInfo, SessionStats, ExerciseTrackingRequest,
@@ -43,7 +50,8 @@ except ImportError:
 app = FastAPI(
     title="Person Movement Tracker API",
     description="Real-time person detection and tracking API",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
@@ -63,6 +71,53 @@ video_analysis_service = None
 guidance_service = None
 background_form_detector = None
 
+# Exercise type lookup by value, avoids constructing the enum per frame
+_EXERCISE_TYPES: Dict[str, ExerciseType] = {e.value: e for e in ExerciseType}
+
+# Binary WebSocket frames: <uint32 LE metadata length><UTF-8 JSON metadata><encoded image bytes>
+_WS_HEADER = struct.Struct('<I')
+
+
+def _unpack_ws_frame(message: bytes) -> Tuple[dict, memoryview]:
+    """Split a binary WebSocket message into its metadata and raw image bytes"""
+    view = memoryview(message)
+    (metadata_length,) = _WS_HEADER.unpack_from(view)
+    offset = _WS_HEADER.size
+    metadata = orjson.loads(view[offset:offset + metadata_length]) if metadata_length else {}
+    return metadata, view[offset + metadata_length:]
+
+
+def _pack_ws_frame(result: dict) -> bytes:
+    """Pack a result dict into a binary WebSocket message, moving 'image' into the payload"""
+    image_bytes = result.pop('image', None) or b''
+    metadata = orjson.dumps(result, option=orjson.OPT_SERIALIZE_NUMPY)
+    # Single copy of the (possibly memoryview) JPEG into the outgoing message
+    return b''.join((_WS_HEADER.pack(len(metadata)), metadata, image_bytes))
+
+
+async def _receive_latest_frames(websocket: WebSocket, frames: asyncio.Queue, max_frames: int):
+    """Drain incoming messages into a queue, keeping only the newest max_frames.
+    
+    Puts None on the queue when the connection ends so the consumer can stop.
+    """
+    try:
+        while True:
+            message = await websocket.receive_bytes()
+            if frames.qsize() >= max_frames:
+                frames.get_nowait()  # Stale frame, inference has fallen behind
+            frames.put_nowait(message)
+    finally:
+        frames.put_nowait(None)
+
+
+def _encode_result_image(result: dict, return_image: bool) -> dict:
+    """Base64-encode the result JPEG for JSON responses, or drop it if not requested"""
+    image_bytes = result.pop('image', None)
+    if return_image and image_bytes:
+        result['image'] = base64.b64encode(image_bytes).decode('utf-8')
+    return result
+
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize services on startup"""
@@ -72,10 +127,18 @@ async def startup_event():
     exercise_tracking_service = ExerciseTrackingService()
     await exercise_tracking_service.initialize()
     
+    # Compile the per-frame angle math before the first request needs it
+    pose_geometry.warmup()
+    
     # Initialize video analysis service with default SQUAT analyzer
     pose_detector = MediaPipePoseDetector()
     analyzer = ExerciseAnalyzerFactory.create_analyzer(ExerciseType.SQUAT, pose_detector)
-    video_analysis_service = VideoAnalysisService(pose_detector, analyzer)
+    video_analysis_service = VideoAnalysisService(
+        pose_detector, analyzer,
+        pose_workers=config.max_batch_size,
+        pose_detector_factory=MediaPipePoseDetector,
+        duplicate_threshold=config.pose_duplicate_threshold
+    )
     
     # Initialize background form detector with YOLO pose and classifier
     try:
@@ -129,67 +192,50 @@ async def root():
     </html>
     """
 
-@app.post("/api/track", response_model=TrackingResponse)
+@app.post("/api/track", responses={200: {"model": TrackingResponse}})
 async def track_persons(request: TrackingRequest):
     """Process image/video frame for person tracking"""
+    # The service already returns a TrackingResponse-shaped dict, so skip
+    # response_model re-validation on this per-frame path
     result = await tracking_service.process_frame(
         image_data=request.image,
         session_id=request.session_id,
         model_type=request.model_type,
         enable_tracking=request.enable_tracking
     )
-    
-    if result['success']:
-        return TrackingResponse(
-            success=True,
-            image=result['image'],
-            detections=result['detections'],
-            inference_time=result['inference_time'],
-            track_count=result['track_count'],
-            model=result['model']
-        )
-    else:
-        return TrackingResponse(
-            success=False,
-            error=result['error']
-        )
+    return ORJSONResponse(content=result)
 
 @app.post("/api/track/file")
 async def track_from_file(
     file: UploadFile = File(...),
     model_type: Optional[str] = Form("yolov8"),
-    enable_tracking: bool = Form(True)
+    enable_tracking: bool = Form(True),
+    return_image: bool = Form(False)
 ):
     """Upload image file for tracking"""
     try:
         # Read file
         contents = await file.read()
         
-        # Convert to base64
-        import base64
-        image_data = base64.b64encode(contents).decode('utf-8')
-        
-        # Process
-        result = await tracking_service.process_frame(
-            image_data=image_data,
+        # Process raw bytes directly, no base64 round-trip
+        result = await tracking_service.process_frame_bytes(
+            image_bytes=contents,
             session_id="file_upload",
             model_type=ModelType(model_type) if model_type else None,
             enable_tracking=enable_tracking
         )
         
-        return JSONResponse(content=result)
+        return ORJSONResponse(content=_encode_result_image(result, return_image))
     
     except Exception as e:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={'error': str(e)}
         )
 
-@app.get("/api/models", response_model=List[ModelInfo])
-async def get_models():
-    """Get available models"""
-    from ..models.detector_factory import DetectorFactory
-    
+@functools.lru_cache(maxsize=1)
+def _available_models() -> List[ModelInfo]:
+    """Build the model list once; the detector registry is fixed at runtime"""
     models = DetectorFactory.get_available_models()
     
     return [
@@ -201,11 +247,14 @@ async def get_models():
         for model_type, info in models.items()
     ]
 
-@app.get("/api/device", response_model=DeviceInfo)
-async def get_device_info():
-    """Get device information and capabilities"""
-    import torch
-    
+@app.get("/api/models", response_model=List[ModelInfo])
+async def get_models():
+    """Get available models"""
+    return _available_models()
+
+@functools.lru_cache(maxsize=1)
+def _device_info() -> DeviceInfo:
+    """Query device capabilities once; they do not change while the server runs"""
     device_info = {
         'device': str(config.device),
         'cuda_available': torch.cuda.is_available(),
@@ -219,6 +268,11 @@ async def get_device_info():
     
     return DeviceInfo(**device_info)
 
+@app.get("/api/device", response_model=DeviceInfo)
+async def get_device_info():
+    """Get device information and capabilities"""
+    return _device_info()
+
 @app.post("/api/guidance/motion-to-exercise")
 async def guidance_motion_to_exercise(payload: Dict[str, Any]):
     """Convert motion keypoints into words, infer exercise, and provide analysis guidance."""
@@ -250,31 +304,40 @@ async def websocket_track(websocket: WebSocket):
     """WebSocket for real-time tracking"""
     await websocket.accept()
     
-    session_id = f"ws_{websocket.client.host}"
+    # One session per connection; clients may share a host (NAT, multiple tabs)
+    session_id = f"ws_{uuid.uuid4().hex}"
     
-    try:
+    frames = asyncio.Queue()
+    receiver = asyncio.create_task(
+        _receive_latest_frames(websocket, frames, config.ws_frame_buffer)
+    )
+    
+    async def images():
         while True:
-            # Receive frame
-            data = await websocket.receive_json()
-            image_data = data.get('image')
-            
-            if not image_data:
-                continue
+            # Receive latest frame
+            message = await frames.get()
+            if message is None:
+                receiver.result()  # Re-raise what ended the receiver
+                return
             
-            # Process frame
-            result = await tracking_service.process_frame(
-                image_data=image_data,
-                session_id=session_id,
-                enable_tracking=True
-            )
+            _, image_bytes = _unpack_ws_frame(message)
             
+            if image_bytes:
+                yield image_bytes
+    
+    try:
+        # Detection of the next frame overlaps drawing and encoding of this one
+        async for result in tracking_service.process_stream(images(), session_id, enable_tracking=True):
             # Send result
-            await websocket.send_json(result)
+            await websocket.send_bytes(_pack_ws_frame(result))
     
     except WebSocketDisconnect:
-        print(f"WebSocket disconnected: {session_id}")
+        logger.info("WebSocket disconnected: %s", session_id)
     except Exception as e:
-        await websocket.send_json({'error': str(e)})
+        await websocket.send_bytes(_pack_ws_frame({'error': str(e)}))
+    finally:
+        receiver.cancel()
+        tracking_service.release_session(session_id)
 
 @app.get("/api/session/{session_id}/stats", response_model=SessionStats)
 async def get_session_stats(session_id: str):
@@ -294,45 +357,34 @@ async def health_check():
 
 # Exercise Tracking Endpoints
 
-@app.post("/api/exercise/track", response_model=ExerciseTrackingResponse)
+@app.post("/api/exercise/track", responses={200: {"model": ExerciseTrackingResponse}})
 async def track_exercise(request: ExerciseTrackingRequest):
     """Process frame for exercise form analysis"""
     if not exercise_tracking_service:
-        return ExerciseTrackingResponse(
-            success=False,
-            error="Exercise tracking service not initialized"
-        )
+        return ORJSONResponse(content={
+            'success': False,
+            'error': "Exercise tracking service not initialized"
+        })
     
+    # Returned as-is, see track_persons
     result = await exercise_tracking_service.process_frame(
         image_data=request.image,
         session_id=request.session_id,
         exercise_type=request.exercise_type,
         enable_tracking=request.enable_tracking
     )
-    
-    if result['success']:
-        return ExerciseTrackingResponse(
-            success=True,
-            image=result.get('image'),
-            pose_data=result.get('pose_data'),
-            analysis=result.get('analysis'),
-            inference_time=result['inference_time']
-        )
-    else:
-        return ExerciseTrackingResponse(
-            success=False,
-            error=result.get('error')
-        )
+    return ORJSONResponse(content=result)
 
 @app.post("/api/exercise/track/file")
 async def track_exercise_from_file(
     file: UploadFile = File(...),
     exercise_type: str = Form("squat"),
-    enable_tracking: bool = Form(True)
+    enable_tracking: bool = Form(True),
+    return_image: bool = Form(False)
 ):
     """Upload image file for exercise tracking"""
     if not exercise_tracking_service:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={'error': 'Exercise tracking service not initialized'}
         )
@@ -341,22 +393,18 @@ async def track_exercise_from_file(
         # Read file
         contents = await file.read()
         
-        # Convert to base64
-        import base64
-        image_data = base64.b64encode(contents).decode('utf-8')
-        
-        # Process
-        result = await exercise_tracking_service.process_frame(
-            image_data=image_data,
-            session_id="file_upload",
+        # Process raw bytes directly, no base64 round-trip
+        result = await exercise_tracking_service.process_frame_bytes(
+            image_bytes=contents,
+            session_id=exercise_tracking_service.UPLOAD_SESSION,
             exercise_type=ExerciseType(exercise_type),
             enable_tracking=enable_tracking
         )
         
-        return JSONResponse(content=result)
+        return ORJSONResponse(content=_encode_result_image(result, return_image))
     
     except Exception as e:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={'error': str(e)}
         )
@@ -370,7 +418,7 @@ async def track_exercise_video(
 ):
     """Upload a 5-10 second video and run exercise form analysis plus comparison feedback"""
     if not video_analysis_service:
-        return JSONResponse(status_code=500, content={'error': 'Video analysis service not initialized'})
+        return ORJSONResponse(status_code=500, content={'error': 'Video analysis service not initialized'})
 
     temp_path = os.path.join(tempfile.gettempdir(), f"exercise_upload_{int(time.time() * 1000)}.mp4")
 
@@ -494,14 +542,11 @@ async def analyze_background_form(
 ):
     """Upload video for background form analysis using YOLO + XGBoost classifier"""
     if not background_form_detector:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={'error': 'Background form detector not initialized'}
         )
     
-    import base64
-    import cv2
-    
     temp_path = os.path.join(tempfile.gettempdir(), f"background_analyze_{int(time.time() * 1000)}.mp4")
     
     try:
@@ -516,20 +561,22 @@ async def analyze_background_form(
         
         frame_idx = 0
         while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
+            # grab() decodes; only kept frames pay for retrieve()'s BGR conversion
+            if not cap.grab():
                 break
             
             if frame_idx % skip_frames == 0:
-                frame_resized = cv2.resize(frame, (640, 480))
-                frames.append(frame_resized)
+                ret, frame = cap.retrieve()
+                if ret:
+                    frame_resized = cv2.resize(frame, (640, 480))
+                    frames.append(frame_resized)
             
             frame_idx += 1
         
         cap.release()
         
         if not frames:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=400,
                 content={'error': 'No frames extracted from video'}
             )
@@ -561,7 +608,7 @@ async def analyze_background_form(
     
     except Exception as e:
         logger.error(f"Error in background form analysis: {e}")
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={'error': str(e)}
         )
@@ -577,7 +624,7 @@ async def analyze_single_frame_background(
 ):
     """Analyze a single image frame for background form detection"""
     if not background_form_detector:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={'error': 'Background form detector not initialized'}
         )
@@ -588,7 +635,7 @@ async def analyze_single_frame_background(
         frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
         
         if frame is None:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=400,
                 content={'error': 'Could not decode image'}
             )
@@ -614,7 +661,7 @@ async def analyze_single_frame_background(
     
     except Exception as e:
         logger.error(f"Error in single frame analysis: {e}")
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={'error': str(e)}
         )
@@ -640,47 +687,68 @@ async def websocket_exercise_track(websocket: WebSocket):
     """WebSocket for real-time exercise tracking"""
     await websocket.accept()
     
-    session_id = f"ws_exercise_{websocket.client.host}"
+    # One session per connection; clients may share a host (NAT, multiple tabs)
+    session_id = f"ws_exercise_{uuid.uuid4().hex}"
+    current_exercise_type_str = None
     current_exercise_type = None
     
+    frames = asyncio.Queue()
+    receiver = asyncio.create_task(
+        _receive_latest_frames(websocket, frames, config.ws_frame_buffer)
+    )
+    
     try:
         while True:
-            # Receive frame
-            data = await websocket.receive_json()
-            image_data = data.get('image')
+            # Receive latest frame
+            message = await frames.get()
+            if message is None:
+                receiver.result()  # Re-raise what ended the receiver
+                break
+            
+            data, image_bytes = _unpack_ws_frame(message)
             exercise_type_str = data.get('exercise_type', 'squat')
             
-            if not image_data:
+            if not image_bytes:
                 continue
             
-            # Reset if exercise type changed
-            if current_exercise_type != exercise_type_str:
-                current_exercise_type = exercise_type_str
-                try:
-                    exercise_tracking_service.reset_analyzer(ExerciseType(exercise_type_str))
-                except ValueError:
-                    pass
+            # Resolve and reset only when the client switches exercise
+            if exercise_type_str != current_exercise_type_str:
+                exercise_type = _EXERCISE_TYPES.get(exercise_type_str)
+                if exercise_type is None:
+                    await websocket.send_bytes(_pack_ws_frame({
+                        'success': False,
+                        'error': f'Invalid exercise type: {exercise_type_str}'
+                    }))
+                    continue
+                
+                if exercise_type is not current_exercise_type:
+                    exercise_tracking_service.reset_analyzer(exercise_type)
+                current_exercise_type_str = exercise_type_str
+                current_exercise_type = exercise_type
             
             # Process frame
-            result = await exercise_tracking_service.process_frame(
-                image_data=image_data,
+            result = await exercise_tracking_service.process_frame_bytes(
+                image_bytes=image_bytes,
                 session_id=session_id,
-                exercise_type=ExerciseType(exercise_type_str),
+                exercise_type=current_exercise_type,
                 enable_tracking=True
             )
             
             # Send result
-            await websocket.send_json(result)
+            await websocket.send_bytes(_pack_ws_frame(result))
     
     except WebSocketDisconnect:
-        print(f"WebSocket disconnected: {session_id}")
+        logger.info("WebSocket disconnected: %s", session_id)
     except Exception as e:
-        await websocket.send_json({'error': str(e)})
+        await websocket.send_bytes(_pack_ws_frame({'error': str(e)}))
+    finally:
+        receiver.cancel()
+        exercise_tracking_service.release_session(session_id)
 
 
 # If youtube_routes module is present, wire its routes too
 try:
     from .youtube_routes import setup_youtube_routes
-    setup_youtube_routes(app)
+    setup_youtube_routes(app, lambda: video_analysis_service)
 except Exception as e:
     logger.info(f"YouTube route registration skipped: {e}")
\ No newline at end of file
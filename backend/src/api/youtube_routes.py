@@ -4,24 +4,46 @@ Extension to main routes for YouTube video fetching and analysis
 """
 
 from fastapi import HTTPException, Form
+from fastapi.responses import StreamingResponse
 from typing import Optional
+import asyncio
 import logging
+import orjson
 
 logger = logging.getLogger(__name__)
 
 
-def setup_youtube_routes(app):
+def setup_youtube_routes(app, get_video_analysis_service=None):
     """
     Setup YouTube analysis routes
     
     Args:
         app: FastAPI application instance
+        get_video_analysis_service: Optional callable returning the shared
+            VideoAnalysisService created at startup
     """
     from ..services.youtube_service import YouTubeService
-    from ..models.exercise_analyzer import ExerciseType
+    from ..services.video_analysis_service import VideoAnalysisService
+    from ..models.pose_estimator import MediaPipePoseDetector
+    from ..models.exercise_analyzer import ExerciseAnalyzerFactory, ExerciseType
     
     youtube_service = YouTubeService()
-    video_analysis_service = None  # Will be set from main routes
+    fallback_service = None  # Created on first use if no shared service is available
+    
+    def get_analysis_service() -> VideoAnalysisService:
+        """Return the startup-initialized service, creating one only if needed"""
+        nonlocal fallback_service
+        
+        if get_video_analysis_service:
+            service = get_video_analysis_service()
+            if service is not None:
+                return service
+        
+        if fallback_service is None:
+            pose_detector = MediaPipePoseDetector()
+            analyzer = ExerciseAnalyzerFactory.create_analyzer(ExerciseType.SQUAT, pose_detector)
+            fallback_service = VideoAnalysisService(pose_detector, analyzer)
+        return fallback_service
     
     @app.post("/api/youtube/video-info")
     async def get_youtube_info(url: str = Form(...)):
@@ -46,6 +68,83 @@ def setup_youtube_routes(app):
             raise HTTPException(status_code=500, detail=str(e))
 
 
+    def validate_analysis_request(url: str, exercise_type: Optional[str]) -> None:
+        """Raise HTTPException for a missing URL or unknown exercise type"""
+        if not url:
+            raise HTTPException(status_code=400, detail="URL is required")
+        
+        # Check for valid exercise type if provided
+        valid_exercises = [e.value for e in ExerciseType]
+        if exercise_type and exercise_type.lower() not in valid_exercises:
+            raise HTTPException(
+                status_code=400, 
+                detail=f"Invalid exercise type. Valid types: {', '.join(valid_exercises)}"
+            )
+    
+    async def run_analysis(url: str, exercise_type: Optional[str], progress_callback) -> dict:
+        """
+        Download a YouTube video and analyze it
+        
+        Args:
+            url: YouTube video URL
+            exercise_type: Type of exercise to analyze
+            progress_callback: Async callback receiving per-frame progress dicts
+            
+        Returns:
+            Response payload with analysis results
+        """
+        # Download video
+        logger.info(f"Downloading YouTube video: {url}")
+        success, video_path, error = await youtube_service.fetch_video(url, max_duration=600)
+        
+        if not success:
+            raise HTTPException(status_code=400, detail=f"Failed to download video: {error}")
+        
+        try:
+            # Frames are decoded lazily and streamed through the analysis pipeline
+            frames = youtube_service.iter_frames(video_path, frame_interval=5)
+            expected_frames = youtube_service.estimate_frame_count(video_path, frame_interval=5)
+            
+            # Analyze video
+            logger.info(f"Analyzing frames from: {video_path}")
+            
+            video_analysis_service = get_analysis_service()
+            
+            try:
+                analysis_result = await video_analysis_service.analyze_frames(
+                    frames=frames,
+                    exercise_type=exercise_type,
+                    callback=progress_callback,
+                    total_frames=expected_frames
+                )
+            except (FileNotFoundError, ValueError) as e:
+                raise HTTPException(status_code=400, detail=f"Failed to extract frames: {e}")
+            
+            if not analysis_result.analyzed_frames:
+                raise HTTPException(status_code=400, detail="No frames extracted from video")
+            
+            # Convert to dictionary for JSON response
+            return {
+                "success": True,
+                "url": url,
+                "exercise_type": exercise_type or "general",
+                "total_frames": analysis_result.total_frames,
+                "analyzed_frames": analysis_result.analyzed_frames,
+                "duration": round(analysis_result.duration, 2),
+                "fps": analysis_result.fps,
+                "summary": analysis_result.summary,
+                # Return first 20 frames for detail
+                "frame_analyses": [
+                    frame_analysis.to_dict()
+                    for frame_analysis in analysis_result.frame_analyses[:20]
+                ]
+            }
+        
+        finally:
+            # Clean up downloaded video
+            logger.info(f"Cleaning up video file: {video_path}")
+            youtube_service.cleanup_video(video_path)
+    
     @app.post("/api/youtube/analyze")
     async def analyze_youtube_video(
         url: str = Form(...),
@@ -62,79 +161,74 @@ def setup_youtube_routes(app):
             Video analysis results with form feedback
         """
         try:
-            if not url:
-                raise HTTPException(status_code=400, detail="URL is required")
+            validate_analysis_request(url, exercise_type)
             
-            # Check for valid exercise type if provided
-            valid_exercises = [e.value for e in ExerciseType]
-            if exercise_type and exercise_type.lower() not in valid_exercises:
-                raise HTTPException(
-                    status_code=400, 
-                    detail=f"Invalid exercise type. Valid types: {', '.join(valid_exercises)}"
-                )
-            
-            # Download video
-            logger.info(f"Downloading YouTube video: {url}")
-            success, video_path, error = await youtube_service.fetch_video(url, max_duration=600)
-            
-            if not success:
-                raise HTTPException(status_code=400, detail=f"Failed to download video: {error}")
-            
-            try:
-                # Extract frames
-                logger.info(f"Extracting frames from: {video_path}")
-                success, frames, error = await youtube_service.extract_frames(video_path, frame_interval=5)
-                
-                if not success:
-                    raise HTTPException(status_code=400, detail=f"Failed to extract frames: {error}")
-                
-                if not frames:
-                    raise HTTPException(status_code=400, detail="No frames extracted from video")
-                
-                # Analyze video
-                logger.info(f"Analyzing {len(frames)} frames")
-                
-                # Create progress callback
-                async def progress_callback(data):
-                    logger.info(f"Progress: {data['progress']:.1f}% - Frame {data['current_frame']}/{data['total_frames']}")
-                
-                from ..services.video_analysis_service import VideoAnalysisService
-                from ..models.pose_estimator import MediaPipePoseDetector
-                from ..models.exercise_analyzer import ExerciseAnalyzerFactory
-                
-                pose_detector = MediaPipePoseDetector()
-                analyzer = ExerciseAnalyzerFactory.create_analyzer(ExerciseType.SQUAT, pose_detector)
-                video_analysis_service = VideoAnalysisService(pose_detector, analyzer)
-                
-                analysis_result = await video_analysis_service.analyze_frames(
-                    frames=frames,
-                    exercise_type=exercise_type,
-                    callback=progress_callback
-                )
-                
-                # Convert to dictionary for JSON response
-                return {
-                    "success": True,
-                    "url": url,
-                    "exercise_type": exercise_type or "general",
-                    "total_frames": analysis_result.total_frames,
-                    "analyzed_frames": analysis_result.analyzed_frames,
-                    "duration": round(analysis_result.duration, 2),
-                    "fps": analysis_result.fps,
-                    "summary": analysis_result.summary,
-                    "frame_analyses": analysis_result.frame_analyses[:20]  # Return first 20 frames for detail
-                }
+            # Create progress callback
+            async def progress_callback(data):
+                logger.info(f"Progress: {data['progress']:.1f}% - Frame {data['current_frame']}/{data['total_frames']}")
             
-            finally:
-                # Clean up downloaded video
-                logger.info(f"Cleaning up video file: {video_path}")
-                youtube_service.cleanup_video(video_path)
+            return await run_analysis(url, exercise_type, progress_callback)
         
         except HTTPException:
             raise
         except Exception as e:
             logger.error(f"Error analyzing YouTube video: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+    
+    
+    @app.post("/api/youtube/analyze-stream")
+    async def analyze_youtube_video_stream(
+        url: str = Form(...),
+        exercise_type: Optional[str] = Form(None)
+    ):
+        """
+        Fetch YouTube video and analyze exercise form, streaming progress
+        
+        Responds with newline-delimited JSON. Each line has an ``event`` key:
+        ``status`` and ``progress`` while the video is processed, then a single
+        ``result`` (same payload as /api/youtube/analyze) or ``error``.
+        
+        Args:
+            url: YouTube video URL
+            exercise_type: Type of exercise to analyze (e.g., 'squat', 'pushup', 'lunge')
+        """
+        validate_analysis_request(url, exercise_type)
+        
+        events: asyncio.Queue = asyncio.Queue()
+        
+        async def progress_callback(data):
+            await events.put({"event": "progress", **data})
+        
+        async def run():
+            try:
+                await events.put({"event": "status", "message": "Downloading video"})
+                result = await run_analysis(url, exercise_type, progress_callback)
+                await events.put({"event": "result", **result})
+            except HTTPException as e:
+                await events.put({"event": "error", "success": False,
+                                  "status_code": e.status_code, "detail": e.detail})
+            except Exception as e:
+                logger.error(f"Error analyzing YouTube video: {str(e)}")
+                await events.put({"event": "error", "success": False,
+                                  "status_code": 500, "detail": f"Analysis failed: {str(e)}"})
+            finally:
+                await events.put(None)
+        
+        async def stream():
+            task = asyncio.create_task(run())
+            try:
+                while True:
+                    event = await events.get()
+                    if event is None:
+                        break
+                    yield orjson.dumps(
+                        event, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_APPEND_NEWLINE
+                    )
+            finally:
+                # Stop the analysis if the client disconnects early
+                task.cancel()
+        
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
 
 
     @app.get("/api/youtube/supported-exercises")
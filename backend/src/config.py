@@ -25,6 +25,7 @@ class AppConfig(BaseSettings):
     default_model: ModelType = ModelType.YOLOv8
     confidence_threshold: float = 0.5
     iou_threshold: float = 0.45
+    person_only: bool = True  # Detect only the "person" class
     
     # Device Settings
     device: DeviceType = DeviceType.CPU
@@ -46,7 +47,19 @@ class AppConfig(BaseSettings):
     # Performance
     max_frame_size: str = "[1280,720]"
     mobile_frame_size: str = "[640,480]"
-    enable_fp16: bool = False
+    enable_fp16: Optional[bool] = None  # Mixed precision; unset means on for CUDA
+    weights_dtype: Optional[str] = None  # "bf16" or "fp16" casts HuggingFace weights at load
+    enable_int8: bool = False  # INT8 TensorRT engine for YOLO on CUDA; dynamic INT8 Linear layers for HuggingFace on CPU
+    yolo_export: str = "none"  # "trt" runs YOLO as a TensorRT engine on CUDA, exported at first startup; anything else keeps PyTorch
+    enable_torch_compile: bool = True  # torch.compile HuggingFace models on GPU
+    pose_model_complexity: Optional[int] = None  # MediaPipe complexity; unset means 0 on CPU, 1 otherwise
+    pose_frame_skip: int = 0  # Live-stream frames that may reuse the last pose while the body is still
+    pose_duplicate_threshold: float = 0.0  # Video frames within this mean pixel difference (0-255) of the last detected frame reuse its poses; 0 disables
+    max_pose_sessions: int = 8  # Live sessions with their own MediaPipe graph; least recent evicted
+    ws_frame_buffer: int = 1  # Frames buffered per WebSocket; older frames are dropped
+    enable_dynamic_batching: bool = False  # Batch concurrent frames into one forward pass
+    batch_timeout_ms: float = 5.0  # Longest wait for a batch to fill
+    frame_budget_ms: float = 0.0  # Tracking frames shrink while inference exceeds this; 0 keeps full size
     
     class Config:
         env_file = ".env"
@@ -1,7 +1,11 @@
+import asyncio
+import queue
+import threading
 import time
 from abc import ABC, abstractmethod
+from concurrent.futures import Future
 from dataclasses import dataclass
-from typing import Any, List, Optional, Tuple
+from typing import Any, List, Mapping, Optional, Sequence, Tuple, Union
 
 import numpy as np
 
@@ -13,6 +17,53 @@ class Detection:
     class_name: str
     track_id: Optional[int] = None
 
+@dataclass
+class DetectionsBatch:
+    """Detections stored as parallel arrays, one row per detection"""
+    bboxes: np.ndarray  # float32 [N, 4] as x1, y1, x2, y2
+    confidences: np.ndarray  # float32 [N]
+    class_ids: np.ndarray  # int32 [N]
+    track_ids: Optional[np.ndarray] = None  # int32 [N]
+    
+    def __len__(self) -> int:
+        return len(self.confidences)
+    
+    def __getitem__(self, index) -> 'DetectionsBatch':
+        """Select rows by index, slice or boolean mask"""
+        return DetectionsBatch(
+            bboxes=self.bboxes[index],
+            confidences=self.confidences[index],
+            class_ids=self.class_ids[index],
+            track_ids=self.track_ids[index] if self.track_ids is not None else None
+        )
+    
+    def to_list(self, class_names: Union[Mapping[int, str], Sequence[str]]) -> List[Detection]:
+        """Convert to Detection objects for consumers that work per detection"""
+        if isinstance(class_names, Mapping):
+            def class_name(cls: int) -> str:
+                return class_names.get(cls, f"class_{cls}")
+        else:
+            num_names = len(class_names)
+            
+            def class_name(cls: int) -> str:
+                return class_names[cls] if cls < num_names else f"class_{cls}"
+        
+        track_ids = self.track_ids.tolist() if self.track_ids is not None else [None] * len(self)
+        
+        return [
+            Detection(
+                bbox=bbox,
+                confidence=conf,
+                class_id=cls,
+                class_name=class_name(cls),
+                track_id=track_id
+            )
+            for bbox, conf, cls, track_id in zip(
+                self.bboxes.tolist(), self.confidences.tolist(),
+                self.class_ids.tolist(), track_ids
+            )
+        ]
+
 @dataclass
 class ModelResult:
     detections: List[Detection]
@@ -27,6 +78,7 @@ class BaseDetector(ABC):
         self.confidence_threshold = kwargs.get('confidence_threshold', 0.5)
         self.iou_threshold = kwargs.get('iou_threshold', 0.45)
         self.class_names = kwargs.get('class_names', ['person'])
+        self.kwargs = kwargs
         self._model = None
         
     @abstractmethod
@@ -51,7 +103,9 @@ class BaseDetector(ABC):
     
     def detect(self, frame: np.ndarray) -> ModelResult:
         """Complete detection pipeline"""
-        start_time = time.time()
+        # perf_counter is monotonic and higher resolution than time.time()
+        start_ns = time.perf_counter_ns()
+        frame_shape = frame.shape[:2]
         
         # Preprocess
         processed = self.preprocess(frame)
@@ -60,20 +114,59 @@ class BaseDetector(ABC):
         predictions = self.predict(processed)
         
         # Postprocess
-        detections = self.postprocess(predictions, frame.shape[:2])
+        detections = self.postprocess(predictions, frame_shape)
         
-        inference_time = time.time() - start_time
+        inference_time = (time.perf_counter_ns() - start_ns) * 1e-9
         
         return ModelResult(
             detections=detections,
             inference_time=inference_time,
-            frame_shape=frame.shape[:2],
+            frame_shape=frame_shape,
             model_name=self.model_name
         )
     
-    def filter_detections(self, detections: List[Detection], 
-                         class_filter: Optional[List[int]] = None) -> List[Detection]:
-        """Filter detections by confidence and class"""
+    def predict_batch(self, processed_inputs: List[Any]) -> List[Any]:
+        """Run inference on several preprocessed inputs, one prediction per input.
+        
+        Defaults to one predict() call per input; override when the model can
+        run a real batched forward pass.
+        """
+        return [self.predict(processed) for processed in processed_inputs]
+    
+    def detect_batch(self, frames: List[np.ndarray]) -> List[ModelResult]:
+        """Detection pipeline over several frames with a single predict_batch call"""
+        start_ns = time.perf_counter_ns()
+        frame_shapes = [frame.shape[:2] for frame in frames]
+        
+        processed = [self.preprocess(frame) for frame in frames]
+        predictions = self.predict_batch(processed)
+        detections = [
+            self.postprocess(prediction, frame_shape)
+            for prediction, frame_shape in zip(predictions, frame_shapes)
+        ]
+        
+        # Every frame waited for the whole batch
+        inference_time = (time.perf_counter_ns() - start_ns) * 1e-9
+        
+        return [
+            ModelResult(
+                detections=frame_detections,
+                inference_time=inference_time,
+                frame_shape=frame_shape,
+                model_name=self.model_name
+            )
+            for frame_detections, frame_shape in zip(detections, frame_shapes)
+        ]
+    
+    def filter_detections(self, detections: Union[List[Detection], DetectionsBatch],
+                         class_filter: Optional[List[int]] = None) -> Union[List[Detection], DetectionsBatch]:
+        """Filter detections by confidence and class, returning the same container type"""
+        if isinstance(detections, DetectionsBatch):
+            mask = detections.confidences >= self.confidence_threshold
+            if class_filter is not None:
+                mask &= np.isin(detections.class_ids, class_filter)
+            return detections[mask]
+        
         filtered = []
         for det in detections:
             if det.confidence >= self.confidence_threshold:
@@ -81,8 +174,156 @@ class BaseDetector(ABC):
                     filtered.append(det)
         return filtered
     
+    @staticmethod
+    def nms(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float,
+            class_ids: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Greedy non-maximum suppression with vectorized IoU
+        
+        Args:
+            boxes: [N, 4] boxes as x1, y1, x2, y2
+            scores: [N] confidence scores
+            iou_threshold: Boxes overlapping a kept box above this IoU are dropped
+            class_ids: Optional [N] class ids; boxes only suppress their own class
+            
+        Returns:
+            Indices of kept boxes, highest score first
+        """
+        boxes = np.asarray(boxes, dtype=np.float32)
+        if len(boxes) == 0:
+            return np.empty(0, dtype=np.intp)
+        
+        if class_ids is not None:
+            # Shift each class into its own coordinate range so classes never overlap
+            offsets = np.asarray(class_ids, dtype=np.float32) * (boxes.max() + 1.0)
+            boxes = boxes + offsets[:, None]
+        
+        x1, y1, x2, y2 = boxes.T
+        areas = (x2 - x1).clip(0) * (y2 - y1).clip(0)
+        order = np.argsort(scores)[::-1]
+        
+        keep = []
+        while order.size:
+            i = order[0]
+            keep.append(i)
+            rest = order[1:]
+            
+            inter_w = (np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest])).clip(0)
+            inter_h = (np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest])).clip(0)
+            inter = inter_w * inter_h
+            iou = inter / (areas[i] + areas[rest] - inter + 1e-9)
+            
+            order = rest[iou <= iou_threshold]
+        
+        return np.array(keep, dtype=np.intp)
+    
     def warmup(self, iterations: int = 10):
         """Warmup the model with dummy data"""
         dummy_frame = np.random.randint(0, 255, (640, 480, 3), dtype=np.uint8)
+        frame_shape = dummy_frame.shape[:2]
+        # Run the pipeline stages directly; timing and ModelResult aren't needed here
         for _ in range(iterations):
-            _ = self.detect(dummy_frame)
\ No newline at end of file
+            self.postprocess(self.predict(self.preprocess(dummy_frame)), frame_shape)
+
+
+class BatchedDetector:
+    """
+    Groups concurrent detect() calls into detect_batch() calls on a detector
+    
+    detect() blocks like a plain detector, so callers running it in a thread
+    pool need no changes. A batch runs once max_batch_size frames are waiting,
+    or batch_timeout seconds after its first frame arrived.
+    """
+    
+    def __init__(self, detector: BaseDetector, max_batch_size: int = 4,
+                 batch_timeout: float = 0.005):
+        self.detector = detector
+        self.max_batch_size = max_batch_size
+        self.batch_timeout = batch_timeout
+        self._requests = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+    
+    def __getattr__(self, name):
+        # Everything other than detect() is served by the wrapped detector
+        return getattr(self.detector, name)
+    
+    def detect(self, frame: np.ndarray) -> ModelResult:
+        """Queue a frame for the next batch and wait for its result"""
+        future = Future()
+        self._requests.put((frame, future))
+        return future.result()
+    
+    def _run(self):
+        while True:
+            batch = [self._requests.get()]
+            deadline = time.perf_counter() + self.batch_timeout
+            
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            try:
+                results = self.detector.detect_batch([frame for frame, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+
+class DetectorWorker:
+    """
+    Runs one detector's detect() calls on its own thread, in arrival order
+    
+    Awaiting detect() hands the frame over through a SimpleQueue and resolves an
+    asyncio future, which costs about half of a run_in_executor round trip. The
+    detector only ever runs on this thread, so it needs no lock of its own.
+    """
+    
+    def __init__(self, detector: Any):
+        self.detector = detector
+        self._requests = queue.SimpleQueue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+    
+    async def detect(self, frame: np.ndarray) -> Any:
+        """Queue a frame for the worker thread and wait for its result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._requests.put((frame, loop, future))
+        return await future
+    
+    def close(self):
+        """Stop after the queued frames, then release the detector's resources"""
+        self._requests.put(None)
+    
+    def _run(self):
+        while (request := self._requests.get()) is not None:
+            frame, loop, future = request
+            try:
+                result, error = self.detector.detect(frame), None
+            except Exception as e:
+                result, error = None, e
+            loop.call_soon_threadsafe(_resolve, future, result, error)
+        
+        cleanup = getattr(self.detector, 'cleanup', None)
+        if cleanup is not None:
+            cleanup()
+
+
+def _resolve(future: asyncio.Future, result: Any, error: Optional[BaseException]):
+    # The awaiting request may have been cancelled meanwhile
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
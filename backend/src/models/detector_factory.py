@@ -1,20 +1,21 @@
+import functools
+import importlib
 from typing import Dict, Any
 
 try:
     from ..config import ModelType, DeviceType
-    from .yolo_detector import YOLODetector
-    from .huggingface_detector import HuggingFaceDetector
+    from .base_detector import BatchedDetector
 except ImportError:
     from config import ModelType, DeviceType
-    from models.yolo_detector import YOLODetector
-    from models.huggingface_detector import HuggingFaceDetector
+    from models.base_detector import BatchedDetector
 
 class DetectorFactory:
     """Factory for creating detector instances"""
     
     _model_registry = {
         ModelType.YOLOv8: {
-            'class': YOLODetector,
+            'module': '.yolo_detector',
+            'class': 'YOLODetector',
             'default_args': {
                 'model_path': 'yolov8n.pt',
                 'confidence_threshold': 0.5,
@@ -22,14 +23,16 @@ class DetectorFactory:
             }
         },
         ModelType.DETR: {
-            'class': HuggingFaceDetector,
+            'module': '.huggingface_detector',
+            'class': 'HuggingFaceDetector',
             'default_args': {
                 'model_id': 'facebook/detr-resnet-50',
                 'confidence_threshold': 0.5
             }
         },
         ModelType.YOLOS: {
-            'class': HuggingFaceDetector,
+            'module': '.huggingface_detector',
+            'class': 'HuggingFaceDetector',
             'default_args': {
                 'model_id': 'hustvl/yolos-small',
                 'confidence_threshold': 0.5
@@ -37,18 +40,27 @@ class DetectorFactory:
         }
     }
     
+    _model_descriptions = {
+        ModelType.YOLOv8: "YOLOv8 - Fast, accurate object detection with tracking support",
+        ModelType.DETR: "DETR (DEtection TRansformer) - Transformer-based detection",
+        ModelType.YOLOS: "YOLOS - Vision Transformer for object detection"
+    }
+    
     @classmethod
     def create_detector(cls, 
                        model_type: ModelType,
                        device: str = "cpu",
+                       batched: bool = False,
+                       max_batch_size: int = 4,
+                       batch_timeout: float = 0.005,
                        **kwargs) -> Any:
-        """Create a detector instance"""
+        """Create a detector instance, optionally wrapped to batch concurrent detect() calls"""
         
         if model_type not in cls._model_registry:
             raise ValueError(f"Unknown model type: {model_type}")
         
         model_info = cls._model_registry[model_type]
-        model_class = model_info['class']
+        model_class = cls._load_class(model_info['module'], model_info['class'])
         default_args = model_info['default_args'].copy()
         
         # Update with provided kwargs
@@ -57,8 +69,17 @@ class DetectorFactory:
         # Create instance
         detector = model_class(**default_args)
         
+        if batched:
+            detector = BatchedDetector(detector, max_batch_size, batch_timeout)
+        
         return detector
     
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _load_class(module: str, class_name: str):
+        """Import a detector class on first use, so unused backends never load torch/transformers"""
+        return getattr(importlib.import_module(module, __package__), class_name)
+    
     @classmethod
     def get_available_models(cls) -> Dict[str, Dict]:
         """Get list of available models"""
@@ -73,12 +94,7 @@ class DetectorFactory:
     @classmethod
     def _get_model_description(cls, model_type: ModelType) -> str:
         """Get description for each model"""
-        descriptions = {
-            ModelType.YOLOv8: "YOLOv8 - Fast, accurate object detection with tracking support",
-            ModelType.DETR: "DETR (DEtection TRansformer) - Transformer-based detection",
-            ModelType.YOLOS: "YOLOS - Vision Transformer for object detection"
-        }
-        return descriptions.get(model_type, "Unknown model")
+        return cls._model_descriptions.get(model_type, "Unknown model")
     
     @classmethod
     def _supports_tracking(cls, model_type: ModelType) -> bool:
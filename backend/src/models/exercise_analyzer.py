@@ -4,13 +4,27 @@ Analyzes exercise form using pose landmarks and provides feedback
 """
 
 import time
-from typing import Any, Dict, List, Optional, Tuple, Union
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple, Union
 from enum import Enum
 import numpy as np
 
 from .pose_estimator import PoseLandmarks, MediaPipePoseDetector
 
 
+# Joint angle triplets (point, joint, point), computed together per frame
+_LEFT_KNEE = ("left_hip", "left_knee", "left_ankle")
+_RIGHT_KNEE = ("right_hip", "right_knee", "right_ankle")
+_LEFT_HIP = ("left_shoulder", "left_hip", "left_knee")
+_RIGHT_HIP = ("right_shoulder", "right_hip", "right_knee")
+_LEFT_ELBOW = ("left_shoulder", "left_elbow", "left_wrist")
+_RIGHT_ELBOW = ("right_shoulder", "right_elbow", "right_wrist")
+
+_SQUAT_ANGLES = (_LEFT_KNEE, _RIGHT_KNEE, _LEFT_HIP, _RIGHT_HIP)
+_PUSHUP_ANGLES = (_LEFT_ELBOW, _RIGHT_ELBOW)
+_KNEE_ANGLES = (_LEFT_KNEE, _RIGHT_KNEE)
+
+
 class ExerciseType(Enum):
     """Supported exercise types"""
     SQUAT = "squat"
@@ -28,12 +42,15 @@ class ExerciseType(Enum):
 class FormIssue:
     """Represents a form issue detected during exercise"""
     
+    # Several issues can be raised per frame; slots avoid a dict per instance
+    __slots__ = ("severity", "message", "suggestion", "affected_landmarks", "timestamp")
+    
     def __init__(self, severity: str, message: str, suggestion: str, 
-                 affected_landmarks: Optional[List[str]] = None):
+                 affected_landmarks: Sequence[str] = ()):
         self.severity = severity  # "critical", "warning", "info"
         self.message = message
         self.suggestion = suggestion
-        self.affected_landmarks = affected_landmarks or []
+        self.affected_landmarks = affected_landmarks
         self.timestamp = time.time()
     
     def to_dict(self) -> Dict[str, Any]:
@@ -41,7 +58,7 @@ class FormIssue:
             "severity": self.severity,
             "message": self.message,
             "suggestion": self.suggestion,
-            "affected_landmarks": self.affected_landmarks,
+            "affected_landmarks": list(self.affected_landmarks),
             "timestamp": self.timestamp
         }
 
@@ -98,10 +115,19 @@ class RepCounter:
 class ExerciseAnalyzer:
     """Base class for exercise form analysis"""
     
+    # Feedback templates, overridden per exercise
+    CRITICAL_HEADER: str = "⚠️ CRITICAL: Fix your form immediately!"
+    WARNING_HEADER: Optional[str] = "⚡ Form improvements needed:"
+    GOOD_FORM_MESSAGE: str = "✅ Great form! Keep it up!"
+    BULLET: str = "• "
+    MAX_CRITICAL_MESSAGES: int = 2
+    MAX_WARNING_MESSAGES: int = 2
+    
     def __init__(self, pose_detector: MediaPipePoseDetector):
         self.pose_detector = pose_detector
         self.rep_counter = None
-        self.form_issues: List[FormIssue] = []
+        # Issues are appended in time order; old ones are dropped from the left
+        self.form_issues: Deque[FormIssue] = deque(maxlen=256)
         self.current_feedback: List[str] = []
     
     def analyze(self, pose_landmarks: PoseLandmarks, frame: np.ndarray) -> Dict[str, Any]:
@@ -121,20 +147,52 @@ class ExerciseAnalyzer:
         """Reset analyzer state"""
         if self.rep_counter:
             self.rep_counter.reset()
-        self.form_issues = []
+        self.form_issues.clear()
         self.current_feedback = []
     
     def _add_form_issue(self, severity: str, message: str, suggestion: str,
-                       affected_landmarks: Optional[List[str]] = None) -> None:
+                       affected_landmarks: Sequence[str] = ()) -> None:
         """Add a form issue to the list"""
         issue = FormIssue(severity, message, suggestion, affected_landmarks)
         self.form_issues.append(issue)
     
     def _get_recent_issues(self, max_age: float = 2.0) -> List[FormIssue]:
-        """Get recent form issues"""
+        """Get recent form issues, discarding expired ones"""
         now = time.time()
-        return [issue for issue in self.form_issues 
-                if now - issue.timestamp < max_age]
+        while self.form_issues and now - self.form_issues[0].timestamp >= max_age:
+            self.form_issues.popleft()
+        return list(self.form_issues)
+
+    def _generate_feedback(self, issues: List[FormIssue]) -> List[str]:
+        """Generate feedback messages from the class-level templates"""
+        if not issues:
+            return [self.GOOD_FORM_MESSAGE]
+        
+        # One pass over the issues, stopping once both severities are filled
+        critical = []
+        warnings = []
+        for issue in issues:
+            if issue.severity == "critical":
+                if len(critical) < self.MAX_CRITICAL_MESSAGES:
+                    critical.append(issue.message)
+            elif issue.severity == "warning":
+                if len(warnings) < self.MAX_WARNING_MESSAGES:
+                    warnings.append(issue.message)
+            if (len(critical) == self.MAX_CRITICAL_MESSAGES
+                    and len(warnings) == self.MAX_WARNING_MESSAGES):
+                break
+        
+        feedback = []
+        if critical:
+            feedback.append(self.CRITICAL_HEADER)
+            feedback.extend(self.BULLET + message for message in critical)
+        
+        if warnings:
+            if self.WARNING_HEADER:
+                feedback.append(self.WARNING_HEADER)
+            feedback.extend(self.BULLET + message for message in warnings)
+        
+        return feedback
 
 
 class SquatAnalyzer(ExerciseAnalyzer):
@@ -163,17 +221,9 @@ class SquatAnalyzer(ExerciseAnalyzer):
             Analysis results
         """
         # Get key angles
-        left_knee_angle = self.pose_detector.get_angle(
-            pose_landmarks, "left_hip", "left_knee", "left_ankle"
-        )
-        right_knee_angle = self.pose_detector.get_angle(
-            pose_landmarks, "right_hip", "right_knee", "right_ankle"
-        )
-        left_hip_angle = self.pose_detector.get_angle(
-            pose_landmarks, "left_shoulder", "left_hip", "left_knee"
-        )
-        right_hip_angle = self.pose_detector.get_angle(
-            pose_landmarks, "right_shoulder", "right_hip", "right_knee"
+        keypoints = self.pose_detector.get_keypoints(pose_landmarks)
+        left_knee_angle, right_knee_angle, left_hip_angle, right_hip_angle = (
+            self.pose_detector.get_angles(pose_landmarks, _SQUAT_ANGLES, keypoints)
         )
         
         # Average angles
@@ -187,7 +237,7 @@ class SquatAnalyzer(ExerciseAnalyzer):
         rep_count = self.rep_counter.update(state)
         
         # Analyze form
-        self._analyze_form(pose_landmarks, knee_angle, hip_angle, 
+        self._analyze_form(keypoints, knee_angle, hip_angle, 
                           left_knee_angle, right_knee_angle,
                           left_hip_angle, right_hip_angle)
         
@@ -219,7 +269,7 @@ class SquatAnalyzer(ExerciseAnalyzer):
         else:
             return ExerciseState.MOVING
     
-    def _analyze_form(self, pose_landmarks: PoseLandmarks, knee_angle: float, hip_angle: float,
+    def _analyze_form(self, keypoints: Dict, knee_angle: float, hip_angle: float,
                       left_knee_angle: float, right_knee_angle: float,
                       left_hip_angle: float, right_hip_angle: float) -> None:
         """Analyze squat form and detect issues"""
@@ -230,7 +280,7 @@ class SquatAnalyzer(ExerciseAnalyzer):
                 "warning",
                 "Squat depth is insufficient",
                 "Try to go lower - aim for thighs parallel to the ground",
-                ["left_knee", "right_knee", "left_hip", "right_hip"]
+                ("left_knee", "right_knee", "left_hip", "right_hip")
             )
         
         # Check knee alignment
@@ -240,7 +290,7 @@ class SquatAnalyzer(ExerciseAnalyzer):
                 "warning",
                 "Knees are not tracking evenly",
                 "Focus on keeping both knees moving at the same pace",
-                ["left_knee", "right_knee"]
+                ("left_knee", "right_knee")
             )
         
         # Check hip alignment
@@ -250,11 +300,10 @@ class SquatAnalyzer(ExerciseAnalyzer):
                 "warning",
                 "Hips are not level",
                 "Keep your hips level throughout the movement",
-                ["left_hip", "right_hip"]
+                ("left_hip", "right_hip")
             )
         
         # Check for knee valgus (knees caving in)
-        keypoints = self.pose_detector.get_keypoints(pose_landmarks)
         if "left_knee" in keypoints and "left_ankle" in keypoints:
             left_knee_x = keypoints["left_knee"][0]
             left_ankle_x = keypoints["left_ankle"][0]
@@ -263,7 +312,7 @@ class SquatAnalyzer(ExerciseAnalyzer):
                     "critical",
                     "Left knee is caving inward (valgus)",
                     "Push your knees out to track over your toes",
-                    ["left_knee", "left_ankle"]
+                    ("left_knee", "left_ankle")
                 )
         
         if "right_knee" in keypoints and "right_ankle" in keypoints:
@@ -274,7 +323,7 @@ class SquatAnalyzer(ExerciseAnalyzer):
                     "critical",
                     "Right knee is caving inward (valgus)",
                     "Push your knees out to track over your toes",
-                    ["right_knee", "right_ankle"]
+                    ("right_knee", "right_ankle")
                 )
         
         # Check for excessive forward lean
@@ -283,30 +332,8 @@ class SquatAnalyzer(ExerciseAnalyzer):
                 "warning",
                 "Excessive forward lean",
                 "Keep your chest up and maintain a more upright torso",
-                ["left_shoulder", "left_hip"]
+                ("left_shoulder", "left_hip")
             )
-    
-    def _generate_feedback(self, issues: List[FormIssue]) -> List[str]:
-        """Generate feedback messages"""
-        feedback = []
-        
-        critical_issues = [i for i in issues if i.severity == "critical"]
-        warning_issues = [i for i in issues if i.severity == "warning"]
-        
-        if critical_issues:
-            feedback.append("⚠️ CRITICAL: Fix your form immediately!")
-            for issue in critical_issues[:2]:
-                feedback.append(f"• {issue.message}")
-        
-        if warning_issues:
-            feedback.append("⚡ Form improvements needed:")
-            for issue in warning_issues[:2]:
-                feedback.append(f"• {issue.message}")
-        
-        if not issues:
-            feedback.append("✅ Great form! Keep it up!")
-        
-        return feedback
 
 
 class PushupAnalyzer(ExerciseAnalyzer):
@@ -333,11 +360,9 @@ class PushupAnalyzer(ExerciseAnalyzer):
             Analysis results
         """
         # Get key angles
-        left_elbow_angle = self.pose_detector.get_angle(
-            pose_landmarks, "left_shoulder", "left_elbow", "left_wrist"
-        )
-        right_elbow_angle = self.pose_detector.get_angle(
-            pose_landmarks, "right_shoulder", "right_elbow", "right_wrist"
+        keypoints = self.pose_detector.get_keypoints(pose_landmarks)
+        left_elbow_angle, right_elbow_angle = self.pose_detector.get_angles(
+            pose_landmarks, _PUSHUP_ANGLES, keypoints
         )
         
         # Average elbow angle
@@ -350,7 +375,7 @@ class PushupAnalyzer(ExerciseAnalyzer):
         rep_count = self.rep_counter.update(state)
         
         # Analyze form
-        self._analyze_form(pose_landmarks, elbow_angle, 
+        self._analyze_form(keypoints, elbow_angle, 
                           left_elbow_angle, right_elbow_angle)
         
         # Get recent issues
@@ -378,7 +403,7 @@ class PushupAnalyzer(ExerciseAnalyzer):
         else:
             return ExerciseState.MOVING
     
-    def _analyze_form(self, pose_landmarks: PoseLandmarks, elbow_angle: float,
+    def _analyze_form(self, keypoints: Dict, elbow_angle: float,
                       left_elbow_angle: float, right_elbow_angle: float) -> None:
         """Analyze push-up form and detect issues"""
         
@@ -388,7 +413,7 @@ class PushupAnalyzer(ExerciseAnalyzer):
                 "warning",
                 "Push-up depth is insufficient",
                 "Lower your chest closer to the ground",
-                ["left_elbow", "right_elbow"]
+                ("left_elbow", "right_elbow")
             )
         
         # Check elbow alignment
@@ -398,11 +423,10 @@ class PushupAnalyzer(ExerciseAnalyzer):
                 "warning",
                 "Arms are not moving evenly",
                 "Focus on keeping both arms moving at the same pace",
-                ["left_elbow", "right_elbow"]
+                ("left_elbow", "right_elbow")
             )
         
         # Check for flaring elbows
-        keypoints = self.pose_detector.get_keypoints(pose_landmarks)
         if "left_shoulder" in keypoints and "left_elbow" in keypoints and "left_wrist" in keypoints:
             shoulder_x = keypoints["left_shoulder"][0]
             elbow_x = keypoints["left_elbow"][0]
@@ -414,7 +438,7 @@ class PushupAnalyzer(ExerciseAnalyzer):
                     "warning",
                     "Left elbow is flaring out",
                     "Keep elbows at about 45 degrees from your body",
-                    ["left_shoulder", "left_elbow", "left_wrist"]
+                    ("left_shoulder", "left_elbow", "left_wrist")
                 )
         
         if "right_shoulder" in keypoints and "right_elbow" in keypoints and "right_wrist" in keypoints:
@@ -427,7 +451,7 @@ class PushupAnalyzer(ExerciseAnalyzer):
                     "warning",
                     "Right elbow is flaring out",
                     "Keep elbows at about 45 degrees from your body",
-                    ["right_shoulder", "right_elbow", "right_wrist"]
+                    ("right_shoulder", "right_elbow", "right_wrist")
                 )
         
         # Check for sagging hips
@@ -440,35 +464,15 @@ class PushupAnalyzer(ExerciseAnalyzer):
                     "critical",
                     "Hips are sagging",
                     "Engage your core to keep your body in a straight line",
-                    ["left_shoulder", "left_hip"]
+                    ("left_shoulder", "left_hip")
                 )
-    
-    def _generate_feedback(self, issues: List[FormIssue]) -> List[str]:
-        """Generate feedback messages"""
-        feedback = []
-        
-        critical_issues = [i for i in issues if i.severity == "critical"]
-        warning_issues = [i for i in issues if i.severity == "warning"]
-        
-        if critical_issues:
-            feedback.append("⚠️ CRITICAL: Fix your form immediately!")
-            for issue in critical_issues[:2]:
-                feedback.append(f"• {issue.message}")
-        
-        if warning_issues:
-            feedback.append("⚡ Form improvements needed:")
-            for issue in warning_issues[:2]:
-                feedback.append(f"• {issue.message}")
-        
-        if not issues:
-            feedback.append("✅ Great form! Keep it up!")
-        
-        return feedback
 
 
 class LungeAnalyzer(ExerciseAnalyzer):
     """Analyzer for lunge exercise form"""
     
+    MAX_CRITICAL_MESSAGES = 0
+    
     def __init__(self, pose_detector: MediaPipePoseDetector):
         super().__init__(pose_detector)
         self.exercise_type = ExerciseType.LUNGE
@@ -496,22 +500,16 @@ class LungeAnalyzer(ExerciseAnalyzer):
         left_knee_y = keypoints.get("left_knee", (0, 0))[1]
         right_knee_y = keypoints.get("right_knee", (0, 0))[1]
         
+        left_knee_angle, right_knee_angle = self.pose_detector.get_angles(
+            pose_landmarks, _KNEE_ANGLES, keypoints
+        )
+        
         # Assume lower knee is the front knee
         if left_knee_y < right_knee_y:
-            front_knee_angle = self.pose_detector.get_angle(
-                pose_landmarks, "left_hip", "left_knee", "left_ankle"
-            )
-            back_knee_angle = self.pose_detector.get_angle(
-                pose_landmarks, "right_hip", "right_knee", "right_ankle"
-            )
+            front_knee_angle, back_knee_angle = left_knee_angle, right_knee_angle
             front_leg = "left"
         else:
-            front_knee_angle = self.pose_detector.get_angle(
-                pose_landmarks, "right_hip", "right_knee", "right_ankle"
-            )
-            back_knee_angle = self.pose_detector.get_angle(
-                pose_landmarks, "left_hip", "left_knee", "left_ankle"
-            )
+            front_knee_angle, back_knee_angle = right_knee_angle, left_knee_angle
             front_leg = "right"
         
         # Determine exercise state
@@ -521,7 +519,7 @@ class LungeAnalyzer(ExerciseAnalyzer):
         rep_count = self.rep_counter.update(state)
         
         # Analyze form
-        self._analyze_form(pose_landmarks, front_knee_angle, back_knee_angle, front_leg)
+        self._analyze_form(keypoints, front_knee_angle, back_knee_angle, front_leg)
         
         # Get recent issues
         recent_issues = self._get_recent_issues()
@@ -548,7 +546,7 @@ class LungeAnalyzer(ExerciseAnalyzer):
         else:
             return ExerciseState.MOVING
     
-    def _analyze_form(self, pose_landmarks: PoseLandmarks, front_knee_angle: float,
+    def _analyze_form(self, keypoints: Dict, front_knee_angle: float,
                       back_knee_angle: float, front_leg: str) -> None:
         """Analyze lunge form and detect issues"""
         
@@ -558,11 +556,10 @@ class LungeAnalyzer(ExerciseAnalyzer):
                 "warning",
                 "Lunge depth is insufficient",
                 "Step deeper into the lunge",
-                [f"{front_leg}_knee"]
+                (f"{front_leg}_knee",)
             )
         
         # Check front knee alignment
-        keypoints = self.pose_detector.get_keypoints(pose_landmarks)
         front_knee = keypoints.get(f"{front_leg}_knee", (0, 0))
         front_ankle = keypoints.get(f"{front_leg}_ankle", (0, 0))
         
@@ -572,7 +569,7 @@ class LungeAnalyzer(ExerciseAnalyzer):
                 "warning",
                 "Front knee is going too far past toes",
                 "Keep your front knee above your ankle",
-                [f"{front_leg}_knee", f"{front_leg}_ankle"]
+                (f"{front_leg}_knee", f"{front_leg}_ankle")
             )
         
         # Check back knee
@@ -581,29 +578,18 @@ class LungeAnalyzer(ExerciseAnalyzer):
                 "warning",
                 "Back knee is not bending enough",
                 "Bend your back knee more for better stretch",
-                [f"{'right' if front_leg == 'left' else 'left'}_knee"]
+                (f"{'right' if front_leg == 'left' else 'left'}_knee",)
             )
-    
-    def _generate_feedback(self, issues: List[FormIssue]) -> List[str]:
-        """Generate feedback messages"""
-        feedback = []
-        
-        warning_issues = [i for i in issues if i.severity == "warning"]
-        
-        if warning_issues:
-            feedback.append("⚡ Form improvements needed:")
-            for issue in warning_issues[:2]:
-                feedback.append(f"• {issue.message}")
-        
-        if not issues:
-            feedback.append("✅ Great form! Keep it up!")
-        
-        return feedback
 
 
 class PlankAnalyzer(ExerciseAnalyzer):
     """Analyzer for plank exercise form"""
     
+    CRITICAL_HEADER = "CRITICAL: Fix plank position immediately!"
+    WARNING_HEADER = "Form improvements needed:"
+    GOOD_FORM_MESSAGE = "Great plank form! Hold it!"
+    BULLET = "- "
+    
     def __init__(self, pose_detector: MediaPipePoseDetector):
         super().__init__(pose_detector)
         self.exercise_type = ExerciseType.PLANK
@@ -650,14 +636,14 @@ class PlankAnalyzer(ExerciseAnalyzer):
                 "critical",
                 "Hips are sagging - lower body drops below shoulder line",
                 "Engage core and glutes to keep hips level with shoulders",
-                ["left_hip", "right_hip"]
+                ("left_hip", "right_hip")
             )
         elif hip_diff < -self.max_hipRaise:
             self._add_form_issue(
                 "warning",
                 "Hips are too high - piking at the waist",
                 "Lower hips to align with shoulders and ankles",
-                ["left_hip", "right_hip"]
+                ("left_hip", "right_hip")
             )
         
         if hip_y is not None and ankle_y is not None:
@@ -667,35 +653,19 @@ class PlankAnalyzer(ExerciseAnalyzer):
                     "warning",
                     "Body not in straight line from head to heels",
                     "Maintain a straight plank position throughout",
-                    ["left_shoulder", "left_hip", "left_ankle"]
+                    ("left_shoulder", "left_hip", "left_ankle")
                 )
-    
-    def _generate_feedback(self, issues: List[FormIssue]) -> List[str]:
-        """Generate feedback messages"""
-        feedback = []
-        
-        critical_issues = [i for i in issues if i.severity == "critical"]
-        warning_issues = [i for i in issues if i.severity == "warning"]
-        
-        if critical_issues:
-            feedback.append("CRITICAL: Fix plank position immediately!")
-            for issue in critical_issues[:2]:
-                feedback.append(f"- {issue.message}")
-        
-        if warning_issues:
-            feedback.append("Form improvements needed:")
-            for issue in warning_issues[:2]:
-                feedback.append(f"- {issue.message}")
-        
-        if not issues:
-            feedback.append("Great plank form! Hold it!")
-        
-        return feedback
 
 
 class DeadliftAnalyzer(ExerciseAnalyzer):
     """Analyzer for deadlift exercise form"""
     
+    CRITICAL_HEADER = "CRITICAL: Risk of back injury!"
+    WARNING_HEADER = None
+    GOOD_FORM_MESSAGE = "Good deadlift form!"
+    BULLET = "- "
+    MAX_CRITICAL_MESSAGES = 1
+    
     def __init__(self, pose_detector: MediaPipePoseDetector):
         super().__init__(pose_detector)
         self.exercise_type = ExerciseType.DEADLIFT
@@ -719,8 +689,9 @@ class DeadliftAnalyzer(ExerciseAnalyzer):
         shoulder_y = (left_shoulder[1] + right_shoulder[1]) / 2 if left_shoulder and right_shoulder else None
         hip_y = (left_hip[1] + right_hip[1]) / 2 if left_hip and right_hip else None
         
-        left_knee_angle = self.pose_detector.get_angle(pose_landmarks, "left_hip", "left_knee", "left_ankle")
-        right_knee_angle = self.pose_detector.get_angle(pose_landmarks, "right_hip", "right_knee", "right_ankle")
+        left_knee_angle, right_knee_angle = self.pose_detector.get_angles(
+            pose_landmarks, _KNEE_ANGLES, keypoints
+        )
         
         self._analyze_form(keypoints, shoulder_x, hip_x, shoulder_y, hip_y, left_knee_angle, right_knee_angle)
         recent_issues = self._get_recent_issues()
@@ -749,7 +720,7 @@ class DeadliftAnalyzer(ExerciseAnalyzer):
                 "critical",
                 "Back rounding detected (spinal flexion)",
                 "Keep back straight - hinge at hips with neutral spine",
-                ["left_shoulder", "right_shoulder", "left_hip", "right_hip"]
+                ("left_shoulder", "right_shoulder", "left_hip", "right_hip")
             )
         
         avg_knee_angle = (left_knee_angle + right_knee_angle) / 2
@@ -758,41 +729,28 @@ class DeadliftAnalyzer(ExerciseAnalyzer):
                 "info",
                 "Full extension at top - lockout complete",
                 "Good lockout position",
-                ["left_knee", "right_knee"]
+                ("left_knee", "right_knee")
             )
         elif avg_knee_angle < 80:
             self._add_form_issue(
                 "info",
                 "Deep hinge position",
                 "Keep tension on hamstrings",
-                ["left_knee", "right_knee"]
+                ("left_knee", "right_knee")
             )
-    
-    def _generate_feedback(self, issues: List[FormIssue]) -> List[str]:
-        """Generate feedback messages"""
-        feedback = []
-        
-        critical_issues = [i for i in issues if i.severity == "critical"]
-        warning_issues = [i for i in issues if i.severity == "warning"]
-        
-        if critical_issues:
-            feedback.append("CRITICAL: Risk of back injury!")
-            for issue in critical_issues[:1]:
-                feedback.append(f"- {issue.message}")
-        
-        if warning_issues:
-            for issue in warning_issues[:2]:
-                feedback.append(f"- {issue.message}")
-        
-        if not issues:
-            feedback.append("Good deadlift form!")
-        
-        return feedback
 
 
 class ExerciseAnalyzerFactory:
     """Factory for creating exercise analyzers"""
     
+    _analyzers = {
+        ExerciseType.SQUAT: SquatAnalyzer,
+        ExerciseType.PUSHUP: PushupAnalyzer,
+        ExerciseType.LUNGE: LungeAnalyzer,
+        ExerciseType.PLANK: PlankAnalyzer,
+        ExerciseType.DEADLIFT: DeadliftAnalyzer,
+    }
+    
     @staticmethod
     def create_analyzer(exercise_type: ExerciseType, 
                        pose_detector: MediaPipePoseDetector) -> ExerciseAnalyzer:
@@ -806,15 +764,7 @@ class ExerciseAnalyzerFactory:
         Returns:
             Exercise analyzer instance
         """
-        analyzers = {
-            ExerciseType.SQUAT: SquatAnalyzer,
-            ExerciseType.PUSHUP: PushupAnalyzer,
-            ExerciseType.LUNGE: LungeAnalyzer,
-            ExerciseType.PLANK: PlankAnalyzer,
-            ExerciseType.DEADLIFT: DeadliftAnalyzer,
-        }
-        
-        analyzer_class = analyzers.get(exercise_type)
+        analyzer_class = ExerciseAnalyzerFactory._analyzers.get(exercise_type)
         if analyzer_class:
             return analyzer_class(pose_detector)
         else:
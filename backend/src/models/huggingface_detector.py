@@ -1,20 +1,47 @@
 import torch
 import numpy as np
-from typing import List, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any
 from transformers import AutoModelForObjectDetection, AutoImageProcessor
 from PIL import Image
 import cv2
 
 try:
-    from .base_detector import BaseDetector, Detection
+    from .base_detector import BaseDetector, Detection, DetectionsBatch
 except ImportError:
-    from base_detector import BaseDetector, Detection
+    from base_detector import BaseDetector, Detection, DetectionsBatch
+
+# Model types with a ResNet (convolutional) backbone; YOLOS and OWL-ViT are plain ViTs
+CHANNELS_LAST_MODEL_TYPES = {'detr', 'conditional_detr', 'deformable_detr', 'table-transformer'}
+
+def _gpu_preprocess(frame: torch.Tensor, height: int, width: int, antialias: bool,
+                    scale: torch.Tensor, offset: torch.Tensor) -> torch.Tensor:
+    """
+    BGR uint8 HWC frame to normalized RGB float 1CHW model input
+    
+    Args:
+        frame: uint8 [H, W, 3] BGR frame on the GPU
+        height, width: Model input size
+        antialias: Antialias the resize (when shrinking)
+        scale, offset: [1, 3, 1, 1] factors so that input = pixel * scale - offset
+        
+    Returns:
+        float32 [1, 3, height, width] pixel values
+    """
+    pixels = frame.flip(-1).permute(2, 0, 1).unsqueeze(0).float()
+    pixels = torch.nn.functional.interpolate(
+        pixels, size=(height, width), mode="bilinear", align_corners=False, antialias=antialias
+    )
+    return pixels * scale - offset
 
 class HuggingFaceDetector(BaseDetector):
     def __init__(self, model_id: str, **kwargs):
         super().__init__(model_name=model_id, **kwargs)
         self.model_id = model_id
         self.image_processor = None
+        # Frame shape -> (height, width, pixel_mask) of the processor's output
+        self._fast_preprocess: Dict[Tuple[int, ...], Optional[Tuple[int, int, Optional[torch.Tensor]]]] = {}
+        # Frame shape -> (page-locked staging buffer, event marking its last upload) for CUDA
+        self._pinned_frames: Dict[Tuple[int, ...], Tuple[torch.Tensor, Any]] = {}
         self.load_model()
     
     def load_model(self):
@@ -38,33 +65,234 @@ class HuggingFaceDetector(BaseDetector):
         ).to(self.device)
         
         self._model.eval()
+        self._model.requires_grad_(False)
+        
+        # torch.autocast takes a device type, not a device string like "cuda:0"
+        self._autocast_device = "cuda" if "cuda" in str(self.device) else "cpu"
+        
+        # Process-wide switches, so only set once a CUDA model is actually loaded:
+        # TF32 tensor cores for matmuls, and cuDNN kernel autotuning, which re-runs
+        # per input shape and so only pays off for the compiled fixed-shape graphs
+        if self._autocast_device == "cuda":
+            torch.set_float32_matmul_precision("high")
+            if self.kwargs.get('compile', True):
+                torch.backends.cudnn.benchmark = True
+        
+        # Casting the weights up-front makes autocast unnecessary
+        self._weights_dtype = {'bf16': torch.bfloat16, 'fp16': torch.float16}.get(
+            self.kwargs.get('weights_dtype')
+        )
+        if self._weights_dtype is not None:
+            self._model = self._model.to(dtype=self._weights_dtype)
+        
+        # INT8 weights for the transformer's Linear layers, dequantized per matmul on CPU
+        self._int8 = bool(self.kwargs.get('int8')) and self._autocast_device == "cpu" and self._weights_dtype is None
+        if self._int8:
+            self._model = torch.ao.quantization.quantize_dynamic(
+                self._model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        
+        # Mixed precision defaults to on for CUDA; BF16 where supported (Ampere+)
+        use_fp16 = self.kwargs.get('enable_fp16')
+        if use_fp16 is None:
+            use_fp16 = self._autocast_device == "cuda"
+        self._autocast_dtype = None
+        if use_fp16 and self._weights_dtype is None and not self._int8:
+            if self._autocast_device == "cuda" and not torch.cuda.is_bf16_supported():
+                self._autocast_dtype = torch.float16
+            else:
+                self._autocast_dtype = torch.bfloat16
+        
+        # Steady-state frames share one shape, so the fused preprocessing compiles once per size
+        self._gpu_preprocess = _gpu_preprocess
+        if self.kwargs.get('compile', True) and self._autocast_device == "cuda":
+            self._gpu_preprocess = torch.compile(_gpu_preprocess, dynamic=False)
+        
+        # Side stream for input uploads and GPU preprocessing
+        self._copy_stream = torch.cuda.Stream(device=self.device) if self._autocast_device == "cuda" else None
+        
+        # NHWC lets cuDNN use tensor-core conv kernels; only worth it for CNN backbones
+        self._channels_last = (
+            self._autocast_device == "cuda"
+            and getattr(self._model.config, 'model_type', None) in CHANNELS_LAST_MODEL_TYPES
+        )
+        if self._channels_last:
+            self._model = self._model.to(memory_format=torch.channels_last)
+        
+        # Graph-compile on GPU; BaseDetector.warmup absorbs the compile time at startup
+        if self.kwargs.get('compile', True) and self.device != "cpu":
+            self._model = torch.compile(self._model, mode="reduce-overhead", dynamic=False)
         
         # Get class names
         if hasattr(self._model.config, 'id2label'):
             self.class_names = list(self._model.config.id2label.values())
         else:
             self.class_names = ['person']  # Default
+        
+        # Label ids to keep when only some classes are wanted (e.g. ["person"])
+        self._class_filter = None
+        classes = self.kwargs.get('classes')
+        if classes:
+            self._class_filter = [i for i, name in enumerate(self.class_names) if name in classes]
     
-    def preprocess(self, frame: np.ndarray) -> torch.Tensor:
+    def preprocess(self, frame: np.ndarray) -> Dict[str, torch.Tensor]:
         """Convert frame to model input format"""
-        # Convert BGR to RGB
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        pil_image = Image.fromarray(rgb_frame)
+        if frame.shape not in self._fast_preprocess:
+            self._fast_preprocess[frame.shape] = self._fit_fast_preprocess(
+                cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            )
+        fast = self._fast_preprocess[frame.shape]
+        
+        if fast is None:
+            # Convert BGR to RGB and process image
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            inputs = self.image_processor(images=Image.fromarray(rgb_frame), return_tensors="pt")
+            inputs = inputs.to(self.device)
+            if self._channels_last:
+                inputs["pixel_values"] = inputs["pixel_values"].to(memory_format=torch.channels_last)
+            return inputs
+        
+        height, width, pixel_mask = fast
+        shrinking = height < frame.shape[0]
+        
+        if self._autocast_device == "cuda":
+            # Upload the raw uint8 BGR frame once; channel swap, resize and normalize run on the GPU.
+            # Working on a side stream lets this overlap a forward pass already running on the
+            # compute stream (e.g. from another detect() thread)
+            compute_stream = torch.cuda.current_stream()
+            pinned, uploaded = self._stage_pinned(frame)
+            with torch.cuda.stream(self._copy_stream):
+                # From page-locked memory the copy is a real async DMA, not a staged sync copy
+                pixels = pinned.to(self.device, non_blocking=True)
+                uploaded.record()
+                pixel_values = self._gpu_preprocess(
+                    pixels, height, width, shrinking, self._pixel_scale_gpu, self._pixel_offset_gpu
+                )
+            
+            # GPU-side wait: the forward pass queued after this won't start before the input
+            # is ready, and the allocator won't reuse its memory while the compute stream reads it
+            compute_stream.wait_stream(self._copy_stream)
+            pixel_values.record_stream(compute_stream)
+        else:
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            interpolation = cv2.INTER_AREA if shrinking else cv2.INTER_LINEAR
+            resized = cv2.resize(rgb_frame, (width, height), interpolation=interpolation)
+            
+            # Rescale and normalize in one fused multiply-subtract, then HWC -> 1CHW
+            pixels = np.multiply(resized, self._pixel_scale, dtype=np.float32)
+            pixels -= self._pixel_offset
+            pixel_values = torch.from_numpy(np.ascontiguousarray(pixels.transpose(2, 0, 1))[None])
         
-        # Process image
-        inputs = self.image_processor(images=pil_image, return_tensors="pt")
-        return inputs.to(self.device)
+        pixel_values = pixel_values.to(self.device)
+        if self._channels_last:
+            pixel_values = pixel_values.to(memory_format=torch.channels_last)
+        
+        inputs = {"pixel_values": pixel_values}
+        if pixel_mask is not None:
+            inputs["pixel_mask"] = pixel_mask
+        return inputs
+    
+    def _stage_pinned(self, frame: np.ndarray) -> Tuple[torch.Tensor, Any]:
+        """Copy a frame into the reused page-locked buffer for its shape"""
+        entry = self._pinned_frames.get(frame.shape)
+        if entry is None:
+            entry = self._pinned_frames[frame.shape] = (
+                torch.empty(frame.shape, dtype=torch.uint8, pin_memory=True),
+                torch.cuda.Event()
+            )
+        pinned, uploaded = entry
+        
+        # A batch may stage several frames of one shape; don't overwrite an upload still in flight
+        uploaded.synchronize()
+        np.copyto(pinned.numpy(), frame)
+        return entry
+    
+    def _fit_fast_preprocess(self, rgb_frame: np.ndarray) -> Optional[Tuple[int, int, Optional[torch.Tensor]]]:
+        """
+        Learn the processor's output for one frame shape so later frames can skip PIL
+        
+        Args:
+            rgb_frame: A frame of the shape to specialize for
+            
+        Returns:
+            (height, width, pixel_mask) of the processed input, or None when the
+            processor does more than resize, rescale and normalize
+        """
+        processor = self.image_processor
+        if not all(getattr(processor, attr, False) for attr in ('do_rescale', 'do_normalize')):
+            return None
+        
+        inputs = self.image_processor(images=Image.fromarray(rgb_frame), return_tensors="pt")
+        if not set(inputs.keys()) <= {"pixel_values", "pixel_mask"}:
+            return None
+        
+        # (x * rescale - mean) / std == x * scale - offset
+        mean = np.asarray(processor.image_mean, dtype=np.float32)
+        std = np.asarray(processor.image_std, dtype=np.float32)
+        self._pixel_scale = np.float32(processor.rescale_factor) / std
+        self._pixel_offset = mean / std
+        self._pixel_scale_gpu = torch.from_numpy(self._pixel_scale).view(1, 3, 1, 1).to(self.device)
+        self._pixel_offset_gpu = torch.from_numpy(self._pixel_offset).view(1, 3, 1, 1).to(self.device)
+        
+        height, width = inputs["pixel_values"].shape[-2:]
+        # A single unpadded image has an all-ones mask; shared read-only between frames
+        pixel_mask = inputs["pixel_mask"].to(self.device) if "pixel_mask" in inputs else None
+        return height, width, pixel_mask
     
     def predict(self, processed_input: Any) -> dict:
         """Run inference"""
-        with torch.no_grad():
-            if self.kwargs.get('enable_fp16', False):
-                with torch.autocast(device_type=self.device):
+        # inference_mode also skips autograd version and view tracking
+        with torch.inference_mode():
+            if self._weights_dtype is not None:
+                processed_input = {
+                    key: value.to(self._weights_dtype) if value.is_floating_point() else value
+                    for key, value in processed_input.items()
+                }
+                outputs = self._model(**processed_input)
+            elif self._autocast_dtype is not None:
+                with torch.autocast(device_type=self._autocast_device, dtype=self._autocast_dtype):
                     outputs = self._model(**processed_input)
             else:
                 outputs = self._model(**processed_input)
         return outputs
     
+    def predict_batch(self, processed_inputs: List[Any]) -> List[Any]:
+        """Stack same-shape inputs into one forward pass and split the outputs per frame"""
+        shapes = {tuple(inputs['pixel_values'].shape) for inputs in processed_inputs}
+        if len(processed_inputs) == 1:
+            return [self.predict(processed_inputs[0])]
+        if len(shapes) > 1:
+            # Frames of different sizes can't share a tensor. Postprocessing only runs
+            # after the whole batch, and CUDA-graph replays of the compiled model
+            # overwrite the previous call's outputs, so copy each one out first
+            return [self._copy_outputs(self.predict(inputs)) for inputs in processed_inputs]
+        
+        batched_input = {
+            key: torch.cat([inputs[key] for inputs in processed_inputs])
+            for key in processed_inputs[0].keys()
+        }
+        outputs = self.predict(batched_input)
+        
+        # postprocess reads index 0, so give each frame its own batch of one
+        return [
+            type(outputs)(**{
+                key: value[i:i + 1]
+                for key, value in outputs.items()
+                if isinstance(value, torch.Tensor)
+            })
+            for i in range(len(processed_inputs))
+        ]
+    
+    @staticmethod
+    def _copy_outputs(outputs: Any) -> Any:
+        """Clone a forward pass's output tensors out of buffers the next pass may reuse"""
+        with torch.inference_mode():
+            return type(outputs)(**{
+                key: value.clone()
+                for key, value in outputs.items()
+                if isinstance(value, torch.Tensor)
+            })
+    
     def postprocess(self, predictions: dict, frame_shape: Tuple[int, int]) -> List[Detection]:
         """Convert model outputs to detections"""
         height, width = frame_shape
@@ -81,36 +309,33 @@ class HuggingFaceDetector(BaseDetector):
     
     def _process_detr(self, predictions: dict, width: int, height: int) -> List[Detection]:
         """Process DETR model outputs"""
-        detections = []
-        
         # DETR returns logits and bounding boxes
         logits = predictions.logits[0]
         boxes = predictions.pred_boxes[0]
         
-        # Get predictions with sufficient confidence
-        prob = logits.softmax(-1)
-        scores, labels = prob[..., :-1].max(-1)
-        
-        # Convert boxes from [center_x, center_y, width, height] to [x1, y1, x2, y2]
-        for score, label, box in zip(scores, labels, boxes):
-            if score >= self.confidence_threshold:
-                cx, cy, w, h = box.tolist()
-                
-                x1 = (cx - w / 2) * width
-                y1 = (cy - h / 2) * height
-                x2 = (cx + w / 2) * width
-                y2 = (cy + h / 2) * height
-                
-                class_name = self.class_names[label] if label < len(self.class_names) else f"class_{label}"
-                
-                detections.append(Detection(
-                    bbox=[x1, y1, x2, y2],
-                    confidence=float(score),
-                    class_id=int(label),
-                    class_name=class_name
-                ))
+        if self._class_filter is not None:
+            # Wanted classes only: log-softmax of just those logits against the full normalizer
+            class_ids = torch.tensor(self._class_filter, device=logits.device)
+            log_prob = logits[:, class_ids] - logits.logsumexp(-1, keepdim=True)
+            log_scores, best = log_prob.max(-1)
+            scores, labels = log_scores.exp(), class_ids[best]
+        else:
+            # Get predictions with sufficient confidence, dropping the no-object class
+            prob = logits.softmax(-1)
+            scores, labels = prob[..., :-1].max(-1)
+        keep = scores >= self.confidence_threshold
         
-        return detections
+        # Convert kept boxes from [center_x, center_y, width, height] to [x1, y1, x2, y2] pixels
+        centers, sizes = boxes[keep].float().split(2, dim=-1)
+        scale = torch.tensor([width, height, width, height], dtype=torch.float32, device=boxes.device)
+        xyxy = torch.cat([centers - sizes / 2, centers + sizes / 2], dim=-1) * scale
+        
+        batch = DetectionsBatch(
+            bboxes=xyxy.cpu().numpy(),
+            confidences=scores[keep].float().cpu().numpy(),
+            class_ids=labels[keep].int().cpu().numpy()
+        )
+        return batch.to_list(self.class_names)
     
     def _process_yolos(self, predictions: dict, width: int, height: int) -> List[Detection]:
         """Process YOLOS model outputs"""
@@ -124,6 +349,9 @@ class HuggingFaceDetector(BaseDetector):
         )[0]
         
         for score, label, box in zip(results["scores"], results["labels"], results["boxes"]):
+            if self._class_filter is not None and int(label) not in self._class_filter:
+                continue
+            
             x1, y1, x2, y2 = box.tolist()
             
             class_name = self.class_names[label] if label < len(self.class_names) else f"class_{label}"
@@ -157,4 +385,17 @@ class HuggingFaceDetector(BaseDetector):
                         class_name=self.class_names[int(cls)] if int(cls) < len(self.class_names) else f"class_{cls}"
                     ))
         
+        if self._class_filter is not None:
+            detections = [det for det in detections if det.class_id in self._class_filter]
+        
+        # Unlike DETR/YOLOS, generic outputs may contain overlapping duplicates
+        if len(detections) > 1:
+            keep = self.nms(
+                np.array([det.bbox for det in detections]),
+                np.array([det.confidence for det in detections]),
+                self.iou_threshold,
+                np.array([det.class_id for det in detections])
+            )
+            detections = [detections[i] for i in keep]
+        
         return detections
\ No newline at end of file
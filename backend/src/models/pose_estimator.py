@@ -4,7 +4,7 @@ Provides body landmark detection for exercise form analysis
 """
 
 import time
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 import numpy as np
 import cv2
 
@@ -16,14 +16,65 @@ except ImportError:
 
 from .base_detector import BaseDetector
 
+try:
+    from ..utils.pose_geometry import joint_angle, point_distance
+except ImportError:
+    from utils.pose_geometry import joint_angle, point_distance
+
 
 class PoseLandmarks:
     """Data class for pose landmarks"""
     
-    def __init__(self, landmarks: List[Dict[str, float]], confidence: float = 0.0):
-        self.landmarks = landmarks  # List of {x, y, z, visibility}
+    def __init__(self, landmarks: Union[List[Dict[str, float]], np.ndarray], confidence: float = 0.0,
+                 names: Optional[Sequence[str]] = None):
+        """
+        Args:
+            landmarks: List of {id, name, x, y, z, visibility} dicts, or an
+                [N, 4] array of x, y, z, visibility rows
+            confidence: Overall pose confidence
+            names: Landmark name per array row, required with an array
+        """
+        if isinstance(landmarks, np.ndarray):
+            self.array = landmarks
+            self.names = names
+            self._landmarks = None
+        else:
+            self.array = None
+            self.names = None
+            self._landmarks = landmarks
         self.confidence = confidence
         self.timestamp = time.time()
+        self._keypoints: Optional[Dict[str, Tuple[float, float]]] = None
+    
+    @property
+    def landmarks(self) -> List[Dict[str, float]]:
+        """Landmark dicts, built from the array on first access"""
+        if self._landmarks is None:
+            self._landmarks = self.as_dicts()
+        return self._landmarks
+    
+    def as_dicts(self) -> List[Dict[str, float]]:
+        """Convert the landmark array to {id, name, x, y, z, visibility} dicts"""
+        if self.array is None:
+            return self._landmarks
+        
+        return [
+            {"id": idx, "name": name, "x": x, "y": y, "z": z, "visibility": visibility}
+            for idx, (name, (x, y, z, visibility)) in enumerate(zip(self.names, self.array.tolist()))
+        ]
+    
+    @property
+    def keypoints(self) -> Dict[str, Tuple[float, float]]:
+        """Landmark name to (x, y), built on first access and reused afterwards"""
+        if self._keypoints is None:
+            if self.array is not None:
+                self._keypoints = dict(zip(self.names, map(tuple, self.array[:, :2].tolist())))
+            else:
+                self._keypoints = {
+                    landmark["name"]: (landmark["x"], landmark["y"])
+                    for landmark in self._landmarks
+                }
+        return self._keypoints
     
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -76,16 +127,24 @@ class MediaPipePoseDetector:
         "right_foot_index": 32
     }
     
-    def __init__(self, model_complexity: int = 1, min_detection_confidence: float = 0.5,
-                 min_tracking_confidence: float = 0.5, device: str = "cpu"):
+    # Landmark names by index
+    LANDMARK_NAMES = sorted(LANDMARKS, key=LANDMARKS.get)
+    
+    def __init__(self, model_complexity: Optional[int] = None, min_detection_confidence: float = 0.5,
+                 min_tracking_confidence: float = 0.5, device: str = "cpu",
+                 frame_skip: int = 0, max_skip_motion: float = 0.02):
         """
         Initialize MediaPipe Pose detector
         
         Args:
-            model_complexity: Model complexity (0, 1, or 2)
+            model_complexity: Model complexity (0, 1, or 2); defaults to 0 on CPU, 1 otherwise
             min_detection_confidence: Minimum confidence for detection
             min_tracking_confidence: Minimum confidence for tracking
             device: Device to run on (cpu or cuda)
+            frame_skip: Frames that may reuse the last pose between model runs
+                (only for consecutive frames of a single stream)
+            max_skip_motion: Largest normalized landmark movement between the last
+                two model runs at which frames are still skipped
         """
         if not MEDIAPIPE_AVAILABLE:
             raise ImportError(
@@ -93,6 +152,8 @@ class MediaPipePoseDetector:
             )
         
         self.device = device
+        if model_complexity is None:
+            model_complexity = 0 if device == "cpu" else 1
         self.model_complexity = model_complexity
         self.min_detection_confidence = min_detection_confidence
         self.min_tracking_confidence = min_tracking_confidence
@@ -102,6 +163,14 @@ class MediaPipePoseDetector:
         self.mp_drawing = mp.solutions.drawing_utils
         self.pose = None
         self.model_loaded = False
+        self._rgb_buffer: Optional[np.ndarray] = None
+        
+        # Temporal gating: reuse the last pose while the body is nearly still
+        self.frame_skip = frame_skip
+        self.max_skip_motion = max_skip_motion
+        self._last_pose: Optional[PoseLandmarks] = None
+        self._skipped = 0
+        self._still = False
         
         self._load_model()
     
@@ -112,7 +181,10 @@ class MediaPipePoseDetector:
                 model_complexity=self.model_complexity,
                 min_detection_confidence=self.min_detection_confidence,
                 min_tracking_confidence=self.min_tracking_confidence,
-                static_image_mode=False
+                # Video mode: the person detector only runs until landmarks are tracked,
+                # then each frame's ROI comes from the previous frame's landmarks
+                static_image_mode=False,
+                enable_segmentation=False
             )
             self.model_loaded = True
         except Exception as e:
@@ -132,8 +204,15 @@ class MediaPipePoseDetector:
         if not self.model_loaded:
             raise RuntimeError("Model not loaded")
         
-        # Convert BGR to RGB
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        last_pose = self._last_pose
+        if last_pose is not None and self._still and self._skipped < self.frame_skip:
+            self._skipped += 1
+            return [PoseLandmarks(last_pose.array, last_pose.confidence, names=last_pose.names)]
+        
+        # Convert BGR to RGB into a reused buffer; MediaPipe copies the frame in process()
+        if self._rgb_buffer is None or self._rgb_buffer.shape != frame.shape:
+            self._rgb_buffer = np.empty_like(frame)
+        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self._rgb_buffer)
         
         # Process the frame
         results = self.pose.process(rgb_frame)
@@ -144,14 +223,28 @@ class MediaPipePoseDetector:
             # Extract landmarks
             landmarks = self._extract_landmarks(results.pose_landmarks)
             
-            # Calculate overall confidence
-            confidence = self._calculate_confidence(results.pose_landmarks)
+            # Overall confidence is the average visibility
+            confidence = float(landmarks[:, 3].mean(dtype=np.float64))
             
-            poses.append(PoseLandmarks(landmarks, confidence))
+            poses.append(PoseLandmarks(landmarks, confidence, names=self.LANDMARK_NAMES))
+        
+        if self.frame_skip:
+            self._update_skip_state(poses[0] if poses else None)
         
         return poses
     
-    def _extract_landmarks(self, pose_landmarks) -> List[Dict[str, float]]:
+    def _update_skip_state(self, pose: Optional[PoseLandmarks]) -> None:
+        """Allow skipping the next frames only if the body barely moved since the last model run"""
+        if pose is None or self._last_pose is None:
+            self._still = False
+        else:
+            motion = np.abs(pose.array[:, :2] - self._last_pose.array[:, :2]).max()
+            self._still = bool(motion <= self.max_skip_motion)
+        
+        self._last_pose = pose
+        self._skipped = 0
+    
+    def _extract_landmarks(self, pose_landmarks) -> np.ndarray:
         """
         Extract landmarks from MediaPipe result
         
@@ -159,42 +252,16 @@ class MediaPipePoseDetector:
             pose_landmarks: MediaPipe pose landmarks
             
         Returns:
-            List of landmark dictionaries with x, y, z, visibility
+            [33, 4] float32 array of x, y, z, visibility rows in landmark index order
         """
-        landmarks = []
+        # float32 matches the proto fields, so the copy is exact
+        landmarks = np.empty((len(pose_landmarks.landmark), 4), dtype=np.float32)
         
         for idx, landmark in enumerate(pose_landmarks.landmark):
-            landmarks.append({
-                "id": idx,
-                "name": self._get_landmark_name(idx),
-                "x": float(landmark.x),
-                "y": float(landmark.y),
-                "z": float(landmark.z),
-                "visibility": float(landmark.visibility)
-            })
+            landmarks[idx] = (landmark.x, landmark.y, landmark.z, landmark.visibility)
         
         return landmarks
     
-    def _get_landmark_name(self, idx: int) -> str:
-        """Get the name of a landmark by index"""
-        for name, index in self.LANDMARKS.items():
-            if index == idx:
-                return name
-        return f"landmark_{idx}"
-    
-    def _calculate_confidence(self, pose_landmarks) -> float:
-        """
-        Calculate overall confidence from landmarks
-        
-        Args:
-            pose_landmarks: MediaPipe pose landmarks
-            
-        Returns:
-            Average visibility score
-        """
-        visibilities = [lm.visibility for lm in pose_landmarks.landmark]
-        return float(np.mean(visibilities))
-    
     def draw_landmarks(self, frame: np.ndarray, pose_landmarks: PoseLandmarks,
                       draw_connections: bool = True) -> np.ndarray:
         """
@@ -250,15 +317,7 @@ class MediaPipePoseDetector:
         Returns:
             Dictionary of keypoint names to (x, y) coordinates
         """
-        keypoints = {}
-        
-        for landmark in pose_landmarks.landmarks:
-            name = landmark["name"]
-            x = landmark["x"]
-            y = landmark["y"]
-            keypoints[name] = (x, y)
-        
-        return keypoints
+        return pose_landmarks.keypoints
     
     def get_angle(self, pose_landmarks: PoseLandmarks, point1: str, point2: str, point3: str) -> float:
         """
@@ -278,20 +337,41 @@ class MediaPipePoseDetector:
         if point1 not in keypoints or point2 not in keypoints or point3 not in keypoints:
             return 0.0
         
-        p1 = np.array(keypoints[point1])
-        p2 = np.array(keypoints[point2])
-        p3 = np.array(keypoints[point3])
+        x1, y1 = keypoints[point1]
+        x2, y2 = keypoints[point2]
+        x3, y3 = keypoints[point3]
         
-        # Calculate vectors
-        v1 = p1 - p2
-        v2 = p3 - p2
+        return joint_angle(x1, y1, x2, y2, x3, y3)
+    
+    def get_angles(self, pose_landmarks: PoseLandmarks,
+                   triplets: Sequence[Tuple[str, str, str]],
+                   keypoints: Optional[Dict[str, Tuple[float, float]]] = None) -> List[float]:
+        """
+        Calculate several joint angles from a single keypoint lookup
         
-        # Calculate angle
-        angle = np.degrees(np.arccos(
-            np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2) + 1e-6)
-        ))
+        Args:
+            pose_landmarks: Pose landmarks
+            triplets: (point1, point2, point3) names per angle, point2 being the joint
+            keypoints: Keypoints already extracted from pose_landmarks, if available
+            
+        Returns:
+            Angles in degrees in triplet order, 0.0 where a point is missing
+        """
+        if keypoints is None:
+            keypoints = self.get_keypoints(pose_landmarks)
+        
+        angles = []
+        for point1, point2, point3 in triplets:
+            if point1 not in keypoints or point2 not in keypoints or point3 not in keypoints:
+                angles.append(0.0)
+                continue
+            
+            x1, y1 = keypoints[point1]
+            x2, y2 = keypoints[point2]
+            x3, y3 = keypoints[point3]
+            angles.append(joint_angle(x1, y1, x2, y2, x3, y3))
         
-        return angle
+        return angles
     
     def get_distance(self, pose_landmarks: PoseLandmarks, point1: str, point2: str) -> float:
         """
@@ -310,10 +390,18 @@ class MediaPipePoseDetector:
         if point1 not in keypoints or point2 not in keypoints:
             return 0.0
         
-        p1 = np.array(keypoints[point1])
-        p2 = np.array(keypoints[point2])
+        x1, y1 = keypoints[point1]
+        x2, y2 = keypoints[point2]
         
-        return float(np.linalg.norm(p1 - p2))
+        return point_distance(x1, y1, x2, y2)
+    
+    def reset(self) -> None:
+        """Forget tracking state before frames from an unrelated video or stream"""
+        if self.pose:
+            self.pose.reset()
+        self._last_pose = None
+        self._skipped = 0
+        self._still = False
     
     def cleanup(self) -> None:
         """Clean up resources"""
@@ -1,6 +1,7 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+import colorsys
 import numpy as np
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from collections import defaultdict
 import time
 
@@ -11,51 +12,75 @@ try:
 except ImportError:
     from models.base_detector import Detection
 
+# Detections kept per track
+TRACK_HISTORY = 100
+
+def _hls_palette(n_colors: int) -> Tuple[Tuple[int, int, int], ...]:
+    """Evenly spaced hues at fixed lightness and saturation, as RGB 0-255 tuples"""
+    lightness = 0.5
+    saturation = 0.8
+    return tuple(
+        tuple(int(c * 255) for c in colorsys.hls_to_rgb(i / n_colors, lightness, saturation))
+        for i in range(n_colors)
+    )
+
+# Default track palette, built once at import
+TRACK_COLORS = _hls_palette(100)
+
 @dataclass
 class Track:
     track_id: int
-    detections: List[Detection]
     start_time: float
     last_update: float
     color: tuple
+    # History as ring buffers (struct of arrays), filled by add_detection()
+    bboxes: np.ndarray = field(default_factory=lambda: np.zeros((TRACK_HISTORY, 4), dtype=np.float32), repr=False)
+    confidences: np.ndarray = field(default_factory=lambda: np.zeros(TRACK_HISTORY, dtype=np.float32), repr=False)
+    timestamps: np.ndarray = field(default_factory=lambda: np.zeros(TRACK_HISTORY), repr=False)
+    head: int = 0  # Next slot to write
+    count: int = 0  # Filled slots, at most TRACK_HISTORY
+    _last_detection: Optional[Detection] = field(default=None, repr=False)
+    
+    def add_detection(self, det: Detection, timestamp: float):
+        """Append a detection to the track history, overwriting the oldest when full"""
+        i = self.head
+        self.bboxes[i] = det.bbox[:4]
+        self.confidences[i] = det.confidence
+        self.timestamps[i] = timestamp
+        self.head = (i + 1) % TRACK_HISTORY
+        self.count = min(self.count + 1, TRACK_HISTORY)
+        
+        self._last_detection = det
+        self.last_update = timestamp
+    
+    def _ordered(self, buffer: np.ndarray) -> np.ndarray:
+        """Filled part of a ring buffer, oldest first"""
+        if self.count < TRACK_HISTORY:
+            return buffer[:self.count]
+        return np.concatenate((buffer[self.head:], buffer[:self.head]))
     
     @property
     def current_position(self) -> Optional[Detection]:
-        if self.detections:
-            return self.detections[-1]
-        return None
+        return self._last_detection
     
     @property
-    def path(self) -> List[List[float]]:
-        return [det.bbox for det in self.detections]
+    def path(self) -> np.ndarray:
+        """[N, 4] bboxes, oldest first"""
+        return self._ordered(self.bboxes)
     
     @property
     def speed(self) -> float:
-        if len(self.detections) < 2:
+        if self.count < 2:
             return 0.0
         
-        # Calculate average speed in pixels per second
-        total_distance = 0
-        total_time = 0
+        bboxes = self.path
+        centers = (bboxes[:, :2] + bboxes[:, 2:]) / 2
+        timestamps = self._ordered(self.timestamps)
         
-        for i in range(1, len(self.detections)):
-            prev = self.detections[i-1]
-            curr = self.detections[i]
-            
-            # Calculate center points
-            prev_center = [(prev.bbox[0] + prev.bbox[2]) / 2, 
-                          (prev.bbox[1] + prev.bbox[3]) / 2]
-            curr_center = [(curr.bbox[0] + curr.bbox[2]) / 2, 
-                          (curr.bbox[1] + curr.bbox[3]) / 2]
-            
-            # Euclidean distance
-            distance = np.sqrt((curr_center[0] - prev_center[0])**2 + 
-                             (curr_center[1] - prev_center[1])**2)
-            
-            time_diff = curr.timestamp - prev.timestamp if hasattr(curr, 'timestamp') else 0.1
-            
-            total_distance += distance
-            total_time += time_diff
+        # Average speed in pixels per second over the whole path
+        steps = np.diff(centers, axis=0)
+        total_distance = float(np.sqrt((steps * steps).sum(axis=1)).sum())
+        total_time = timestamps[-1] - timestamps[0]
         
         return total_distance / total_time if total_time > 0 else 0.0
 
@@ -119,7 +144,6 @@ class MultiObjectTracker:
                 if track_id not in self.tracks:
                     self.tracks[track_id] = Track(
                         track_id=track_id,
-                        detections=[],
                         start_time=current_time,
                         last_update=current_time,
                         color=self.colors[track_id % len(self.colors)]
@@ -127,12 +151,7 @@ class MultiObjectTracker:
                 
                 # Add timestamp
                 det.timestamp = current_time
-                self.tracks[track_id].detections.append(det)
-                self.tracks[track_id].last_update = current_time
-                
-                # Limit track history
-                if len(self.tracks[track_id].detections) > 100:
-                    self.tracks[track_id].detections.pop(0)
+                self.tracks[track_id].add_detection(det, current_time)
                 
                 updated_detections.append(det)
             
@@ -155,15 +174,9 @@ class MultiObjectTracker:
     
     def _generate_colors(self, n_colors: int = 100):
         """Generate distinct colors for tracks"""
-        import colorsys
-        colors = []
-        for i in range(n_colors):
-            hue = i / n_colors
-            lightness = 0.5
-            saturation = 0.8
-            rgb = colorsys.hls_to_rgb(hue, lightness, saturation)
-            colors.append(tuple(int(c * 255) for c in rgb))
-        return colors
+        if n_colors == len(TRACK_COLORS):
+            return TRACK_COLORS
+        return _hls_palette(n_colors)
     
     def get_track_stats(self) -> Dict[int, Dict[str, Any]]:
         """Get statistics for all active tracks"""
@@ -171,7 +184,7 @@ class MultiObjectTracker:
         for track_id, track in self.tracks.items():
             stats[track_id] = {
                 'age': time.time() - track.start_time,
-                'detection_count': len(track.detections),
+                'detection_count': track.count,
                 'speed': track.speed,
                 'color': track.color
             }
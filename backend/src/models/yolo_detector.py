@@ -1,30 +1,100 @@
+import shutil
+from pathlib import Path
+
 import torch
 import numpy as np
-from typing import List, Tuple, Any
+from typing import List, Optional, Tuple, Any
 from ultralytics import YOLO
 import cv2
 
 try:
-    from .base_detector import BaseDetector, Detection
+    from .base_detector import BaseDetector, Detection, DetectionsBatch
 except ImportError:
-    from models.base_detector import BaseDetector, Detection
+    from models.base_detector import BaseDetector, Detection, DetectionsBatch
 
 class YOLODetector(BaseDetector):
     def __init__(self, model_path: str = 'yolov8n.pt', **kwargs):
         super().__init__(model_name=model_path, **kwargs)
         self.model_path = model_path
+        self._is_engine = False
         self.load_model()
     
     def load_model(self):
-        """Load YOLO model"""
+        """Load YOLO model, as a TensorRT engine when export="trt" on CUDA"""
         print(f"Loading YOLO model: {self.model_path}")
-        self._model = YOLO(self.model_path)
+        self._model = None
+        
+        if self.kwargs.get('export', 'none') == 'trt' and 'cuda' in str(self.device):
+            self._model = self._load_engine()
+        
+        self._is_engine = self._model is not None
+        if self._model is None:
+            self._model = YOLO(self.model_path)
+            
+            # Move to device
+            self._model.to(self.device)
         
-        # Move to device
-        self._model.to(self.device)
+        # FP16 inference for the PyTorch model on CUDA; engines have their precision built in
+        use_fp16 = self.kwargs.get('enable_fp16')
+        if use_fp16 is None:
+            use_fp16 = True
+        self._half = bool(use_fp16) and not self._is_engine and 'cuda' in str(self.device)
         
         # YOLO class names
         self.class_names = self._model.names if hasattr(self._model, 'names') else ['person']
+        
+        # YOLO names is an {id: name} dict; index a list per detection instead
+        if isinstance(self.class_names, dict):
+            self._class_names_list = [
+                self.class_names.get(i, f"class_{i}") for i in range(max(self.class_names, default=-1) + 1)
+            ]
+        else:
+            self._class_names_list = list(self.class_names)
+        
+        # Let Ultralytics drop unwanted classes (e.g. everything but "person") in its NMS
+        classes = self.kwargs.get('classes')
+        self._class_filter = (
+            [i for i, name in enumerate(self._class_names_list) if name in classes] if classes else None
+        )
+    
+    def _load_engine(self) -> Optional[YOLO]:
+        """
+        Load the TensorRT engine for this model, exporting it on first use
+        
+        Returns:
+            The engine-backed model, or None when TensorRT export isn't available
+        """
+        imgsz = self.kwargs.get('imgsz', 640)
+        gpu_name = torch.cuda.get_device_name().replace(' ', '_')
+        int8 = bool(self.kwargs.get('int8'))
+        precision = 'int8' if int8 else 'fp16'
+        
+        # Engines are only valid for the input size, precision and GPU they were built for
+        engine_path = Path(self.kwargs.get('cache_dir', './models')) / (
+            f"{Path(self.model_path).stem}_{imgsz}_{precision}_{gpu_name}.engine"
+        )
+        
+        try:
+            if not engine_path.exists():
+                print(f"Exporting TensorRT engine: {engine_path}")
+                exported = YOLO(self.model_path).export(
+                    format="engine",
+                    half=not int8,
+                    int8=int8,
+                    # INT8 calibration images; the default is Ultralytics' small COCO sample
+                    data=self.kwargs.get('calibration_data', 'coco8.yaml') if int8 else None,
+                    imgsz=imgsz,
+                    dynamic=False,
+                    workspace=4,
+                    device=self.device
+                )
+                engine_path.parent.mkdir(parents=True, exist_ok=True)
+                shutil.move(exported, engine_path)
+            
+            return YOLO(str(engine_path), task='detect')
+        except Exception as e:
+            print(f"TensorRT engine unavailable, using PyTorch model: {e}")
+            return None
     
     def preprocess(self, frame: np.ndarray) -> np.ndarray:
         """YOLO handles preprocessing internally"""
@@ -38,10 +108,22 @@ class YOLODetector(BaseDetector):
             iou=self.iou_threshold,
             device=self.device,
             verbose=False,
-            max_det=50
+            max_det=50,
+            classes=self._class_filter,
+            half=self._half
         )
         return results
     
+    def predict_batch(self, processed_inputs: List[Any]) -> List[Any]:
+        """Run YOLO once over all frames"""
+        if self._is_engine:
+            # The engine is built for a fixed batch of one
+            return super().predict_batch(processed_inputs)
+        
+        results = self.predict(processed_inputs)
+        # postprocess expects the per-call list shape returned by predict()
+        return [[result] for result in results]
+    
     def postprocess(self, predictions: Any, frame_shape: Tuple[int, int]) -> List[Detection]:
         """Convert YOLO results to detections"""
         detections = []
@@ -50,19 +132,14 @@ class YOLODetector(BaseDetector):
             result = predictions[0]
             
             if result.boxes is not None:
+                # Read whole arrays instead of indexing Boxes per detection
                 boxes = result.boxes.cpu().numpy()
-                
-                for box in boxes:
-                    x1, y1, x2, y2 = map(float, box.xyxy[0])
-                    conf = float(box.conf[0])
-                    cls = int(box.cls[0])
-                    
-                    detections.append(Detection(
-                        bbox=[x1, y1, x2, y2],
-                        confidence=conf,
-                        class_id=cls,
-                        class_name=self.class_names.get(cls, f"class_{cls}")
-                    ))
+                batch = DetectionsBatch(
+                    bboxes=boxes.xyxy.astype(np.float32),
+                    confidences=boxes.conf.astype(np.float32),
+                    class_ids=boxes.cls.astype(np.int32)
+                )
+                detections = batch.to_list(self._class_names_list)
         
         return detections
     
@@ -75,7 +152,9 @@ class YOLODetector(BaseDetector):
             device=self.device,
             persist=persist,
             verbose=False,
-            max_det=50
+            max_det=50,
+            classes=self._class_filter,
+            half=self._half
         )
         
         detections = []
@@ -84,19 +163,12 @@ class YOLODetector(BaseDetector):
             
             if result.boxes is not None and result.boxes.id is not None:
                 boxes = result.boxes.cpu().numpy()
-                track_ids = result.boxes.id.cpu().numpy()
-                
-                for box, track_id in zip(boxes, track_ids):
-                    x1, y1, x2, y2 = map(float, box.xyxy[0])
-                    conf = float(box.conf[0])
-                    cls = int(box.cls[0])
-                    
-                    detections.append(Detection(
-                        bbox=[x1, y1, x2, y2],
-                        confidence=conf,
-                        class_id=cls,
-                        class_name=self.class_names.get(cls, f"class_{cls}"),
-                        track_id=int(track_id)
-                    ))
+                batch = DetectionsBatch(
+                    bboxes=boxes.xyxy.astype(np.float32),
+                    confidences=boxes.conf.astype(np.float32),
+                    class_ids=boxes.cls.astype(np.int32),
+                    track_ids=boxes.id.astype(np.int32)
+                )
+                detections = batch.to_list(self._class_names_list)
         
         return detections
\ No newline at end of file
@@ -3,20 +3,25 @@ Exercise Tracking Service
 Handles exercise form analysis and feedback generation
 """
 
+import asyncio
 import time
 import base64
+from collections import OrderedDict
 import numpy as np
 import cv2
 from typing import Dict, Any, Optional
-from concurrent.futures import ThreadPoolExecutor
 
 try:
+    from ..config import config
+    from ..models.base_detector import DetectorWorker
     from ..models.pose_estimator import MediaPipePoseDetector, PoseLandmarks
     from ..models.exercise_analyzer import (
         ExerciseAnalyzerFactory, ExerciseType, ExerciseAnalyzer
     )
     from ..utils.image_processor import ImageProcessor
 except ImportError:
+    from config import config
+    from models.base_detector import DetectorWorker
     from models.pose_estimator import MediaPipePoseDetector, PoseLandmarks
     from models.exercise_analyzer import (
         ExerciseAnalyzerFactory, ExerciseType, ExerciseAnalyzer
@@ -27,11 +32,18 @@ except ImportError:
 class ExerciseTrackingService:
     """Service for exercise form tracking and analysis"""
     
+    # Shared session for one-shot image uploads; its frames are unrelated
+    # images, so its detector never reuses the previous pose
+    UPLOAD_SESSION = "file_upload"
+    
     def __init__(self):
         self.pose_detector: Optional[MediaPipePoseDetector] = None
         self.analyzers: Dict[ExerciseType, ExerciseAnalyzer] = {}
         self.image_processor = ImageProcessor()
-        self.executor = ThreadPoolExecutor(max_workers=2)
+        # Session id -> worker thread running the session's detector, least recently used
+        # first. MediaPipe can't batch frames, so concurrent sessions run their own graphs
+        # in parallel, each keeping its own tracking (and frame-skip) state
+        self._session_detectors: "OrderedDict[str, DetectorWorker]" = OrderedDict()
         self._initialized = False
     
     async def initialize(self) -> None:
@@ -40,29 +52,30 @@ class ExerciseTrackingService:
             return
         
         try:
-            # Initialize pose detector
-            self.pose_detector = MediaPipePoseDetector(
-                model_complexity=1,
-                min_detection_confidence=0.5,
-                min_tracking_confidence=0.5,
-                device="cpu"
-            )
+            # Initialize pose detector; used by the analyzers and for drawing
+            self.pose_detector = self._create_pose_detector()
             
-            # Initialize analyzers for supported exercises
-            supported_exercises = [
-                ExerciseType.SQUAT,
-                ExerciseType.PUSHUP,
-                ExerciseType.LUNGE
-            ]
-            
-            for exercise_type in supported_exercises:
-                try:
-                    analyzer = ExerciseAnalyzerFactory.create_analyzer(
+            # Build analyzers for every exercise type concurrently, so changing
+            # exercise mid-session never pays construction cost
+            exercise_types = list(ExerciseType)
+            analyzers = await asyncio.gather(
+                *[
+                    asyncio.to_thread(
+                        ExerciseAnalyzerFactory.create_analyzer,
                         exercise_type, self.pose_detector
                     )
-                    self.analyzers[exercise_type] = analyzer
-                except Exception as e:
-                    print(f"Failed to initialize analyzer for {exercise_type}: {e}")
+                    for exercise_type in exercise_types
+                ],
+                return_exceptions=True
+            )
+            
+            for exercise_type, analyzer in zip(exercise_types, analyzers):
+                if isinstance(analyzer, ValueError):
+                    continue  # No analyzer implemented for this type
+                if isinstance(analyzer, Exception):
+                    print(f"Failed to initialize analyzer for {exercise_type}: {analyzer}")
+                    continue
+                self.analyzers[exercise_type] = analyzer
             
             self._initialized = True
             print("Exercise tracking service initialized successfully")
@@ -71,6 +84,37 @@ class ExerciseTrackingService:
             print(f"Failed to initialize exercise tracking service: {e}")
             raise
     
+    def _create_pose_detector(self, frame_skip: Optional[int] = None) -> MediaPipePoseDetector:
+        """Create a MediaPipe detector with the live-stream settings"""
+        return MediaPipePoseDetector(
+            model_complexity=config.pose_model_complexity,
+            min_detection_confidence=0.5,
+            min_tracking_confidence=0.5,
+            device="cpu",
+            frame_skip=config.pose_frame_skip if frame_skip is None else frame_skip
+        )
+    
+    def _session_detector(self, session_id: str) -> DetectorWorker:
+        """Get the session's pose detector worker, creating it and evicting the least recently used"""
+        worker = self._session_detectors.pop(session_id, None)
+        if worker is None:
+            frame_skip = 0 if session_id == self.UPLOAD_SESSION else None
+            worker = DetectorWorker(self._create_pose_detector(frame_skip))
+        self._session_detectors[session_id] = worker
+        
+        while len(self._session_detectors) > config.max_pose_sessions:
+            # Closes once its queued frames are done
+            _, evicted = self._session_detectors.popitem(last=False)
+            evicted.close()
+        
+        return worker
+    
+    def release_session(self, session_id: str) -> None:
+        """Free the pose detector of a finished session"""
+        worker = self._session_detectors.pop(session_id, None)
+        if worker is not None:
+            worker.close()
+    
     async def process_frame(
         self,
         image_data: str,
@@ -90,21 +134,68 @@ class ExerciseTrackingService:
         Returns:
             Analysis results
         """
-        if not self._initialized:
-            await self.initialize()
-        
         start_time = time.time()
         
         try:
-            # Decode image
             frame = self.image_processor.decode_base64(image_data)
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e),
+                'inference_time': time.time() - start_time
+            }
+        
+        return await self._process_decoded_frame(
+            frame, session_id, exercise_type, start_time, self.image_processor.encode_base64
+        )
+    
+    async def process_frame_bytes(
+        self,
+        image_bytes: bytes,
+        session_id: str,
+        exercise_type: ExerciseType,
+        enable_tracking: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Process a frame given as raw image bytes for exercise form analysis
+        
+        Args:
+            image_bytes: Raw JPEG/PNG encoded image
+            session_id: Session identifier
+            exercise_type: Type of exercise to analyze
+            enable_tracking: Whether to enable tracking
             
-            if frame is None:
-                return {
-                    'success': False,
-                    'error': 'Failed to decode image'
-                }
-            
+        Returns:
+            Analysis results, with the annotated frame as raw JPEG bytes
+        """
+        start_time = time.time()
+        
+        try:
+            frame = self.image_processor.decode_bytes(image_bytes)
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e),
+                'inference_time': time.time() - start_time
+            }
+        
+        return await self._process_decoded_frame(
+            frame, session_id, exercise_type, start_time, self.image_processor.encode_jpeg
+        )
+    
+    async def _process_decoded_frame(
+        self,
+        frame: np.ndarray,
+        session_id: str,
+        exercise_type: ExerciseType,
+        start_time: float,
+        encode_image
+    ) -> Dict[str, Any]:
+        """Detect pose, analyze form and draw landmarks on a decoded frame"""
+        if not self._initialized:
+            await self.initialize()
+        
+        try:
             # Get analyzer for exercise type
             analyzer = self.analyzers.get(exercise_type)
             if not analyzer:
@@ -113,8 +204,9 @@ class ExerciseTrackingService:
                     'error': f'Unsupported exercise type: {exercise_type}'
                 }
             
-            # Detect pose
-            poses = self.pose_detector.detect(frame)
+            # Detect pose off the event loop, so other sessions' frames run in parallel
+            # Overlapping requests from one session queue up on its worker
+            poses = await self._session_detector(session_id).detect(frame)
             
             if not poses:
                 return {
@@ -134,7 +226,7 @@ class ExerciseTrackingService:
             frame_with_landmarks = self.pose_detector.draw_landmarks(frame, pose)
             
             # Encode frame
-            encoded_image = self.image_processor.encode_base64(frame_with_landmarks)
+            encoded_image = encode_image(frame_with_landmarks)
             
             # Prepare pose data
             pose_data = {
@@ -172,5 +264,7 @@ class ExerciseTrackingService:
         """Clean up resources"""
         if self.pose_detector:
             self.pose_detector.cleanup()
-        self.executor.shutdown(wait=True)
+        while self._session_detectors:
+            _, worker = self._session_detectors.popitem()
+            worker.close()
         self._initialized = False
@@ -1,7 +1,9 @@
-import json
+import threading
 import time
-from typing import Dict, Optional, List
-from dataclasses import dataclass, asdict
+from collections import deque
+from typing import Deque, Dict, Optional, List
+from dataclasses import dataclass, field
+import orjson
 import redis
 
 try:
@@ -9,6 +11,13 @@ try:
 except ImportError:
     from config import config
 
+# Track history entries kept per track, locally and in Redis
+MAX_TRACK_HISTORY = 256
+
+# Session fields stored in the session's Redis hash; track history lives in per-track lists
+# and the track ids in a sorted set scored by last-seen time
+_SCALAR_FIELDS = ('created_at', 'last_activity', 'frame_count', 'total_inference_time')
+
 @dataclass
 class Session:
     session_id: str
@@ -16,13 +25,29 @@ class Session:
     last_activity: float
     frame_count: int
     total_inference_time: float
-    track_history: Dict[int, List[dict]]
+    track_history: Dict[int, Deque[dict]]
+    # Track id -> last-seen timestamp, kept in last-seen order (oldest first)
+    track_last_seen: Dict[int, float] = field(default_factory=dict)
     
     def to_dict(self) -> dict:
-        return asdict(self)
+        # Built directly: asdict() would deep-copy every track history entry
+        return {
+            'session_id': self.session_id,
+            'created_at': self.created_at,
+            'last_activity': self.last_activity,
+            'frame_count': self.frame_count,
+            'total_inference_time': self.total_inference_time,
+            'track_history': {track_id: list(history) for track_id, history in self.track_history.items()},
+            'track_last_seen': self.track_last_seen
+        }
     
     @classmethod
     def from_dict(cls, data: dict) -> 'Session':
+        data = dict(data)
+        data['track_history'] = {
+            int(track_id): deque(history, maxlen=MAX_TRACK_HISTORY)
+            for track_id, history in data['track_history'].items()
+        }
         return cls(**data)
 
 class SessionManager:
@@ -31,6 +56,17 @@ class SessionManager:
         self.local_sessions: Dict[str, Session] = {}
         self.session_timeout = 3600  # 1 hour
         
+        # Write-behind: sessions changed since the last flush, written to Redis in one pipeline.
+        # Only scalar fields and newly added track entries are written, never the whole history
+        self.flush_interval = 0.25  # seconds
+        # Track entries are colder than the session fields and flushed less often, in bigger batches
+        self.track_flush_interval = 2.0  # seconds
+        self._pending: Dict[str, Session] = {}
+        self._pending_tracks: Dict[str, Dict[int, List[dict]]] = {}
+        self._pending_lock = threading.Lock()
+        self._stop_flushing = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        
         # Try to connect to Redis
         try:
             self.redis_client = redis.from_url(config.redis_url)
@@ -91,11 +127,21 @@ class SessionManager:
     
     def delete_session(self, session_id: str):
         """Delete a session"""
+        session = self.local_sessions.pop(session_id, None)
+        
         if self.redis_client:
-            self.redis_client.delete(f"session:{session_id}")
-        else:
-            if session_id in self.local_sessions:
-                del self.local_sessions[session_id]
+            with self._pending_lock:
+                self._pending.pop(session_id, None)
+                self._pending_tracks.pop(session_id, None)
+            
+            key = f"session:{session_id}"
+            track_ids = self.redis_client.zrange(f"{key}:tracks", 0, -1)
+            if session:
+                track_ids = set(track_ids) | set(session.track_history)
+            self.redis_client.delete(
+                key, f"{key}:tracks",
+                *[f"{key}:track:{_decode(track_id)}" for track_id in track_ids]
+            )
     
     def add_frame_result(self, session_id: str, inference_time: float, detections: list):
         """Add frame processing result to session"""
@@ -108,19 +154,27 @@ class SessionManager:
         session.total_inference_time += inference_time
         
         # Update track history
+        timestamp = time.time()
+        new_entries: Dict[int, List[dict]] = {}
         for det in detections:
             track_id = det.get('track_id')
             if track_id:
                 if track_id not in session.track_history:
-                    session.track_history[track_id] = []
+                    session.track_history[track_id] = deque(maxlen=MAX_TRACK_HISTORY)
                 
-                session.track_history[track_id].append({
-                    'timestamp': time.time(),
+                entry = {
+                    'timestamp': timestamp,
                     'bbox': det.get('bbox'),
                     'confidence': det.get('confidence')
-                })
+                }
+                session.track_history[track_id].append(entry)
+                new_entries.setdefault(track_id, []).append(entry)
+                
+                # Re-insert so the dict stays ordered by last-seen time
+                session.track_last_seen.pop(track_id, None)
+                session.track_last_seen[track_id] = timestamp
         
-        self._save_session(session)
+        self._save_session(session, new_entries)
     
     def get_session_stats(self, session_id: str) -> Optional[dict]:
         """Get session statistics"""
@@ -132,6 +186,14 @@ class SessionManager:
         avg_inference_time = (session.total_inference_time / session.frame_count 
                              if session.frame_count > 0 else 0)
         
+        # Walk back from the most recently seen track until one is stale
+        cutoff = time.time() - 30
+        active_tracks = 0
+        for last_seen in reversed(session.track_last_seen.values()):
+            if last_seen < cutoff:
+                break
+            active_tracks += 1
+        
         return {
             'session_id': session_id,
             'created_at': session.created_at,
@@ -139,45 +201,133 @@ class SessionManager:
             'frame_count': session.frame_count,
             'average_inference_time': avg_inference_time,
             'total_tracks': len(session.track_history),
-            'active_tracks': len([t for t in session.track_history.values() 
-                                 if t and time.time() - t[-1]['timestamp'] < 30])
+            'active_tracks': active_tracks
         }
     
     def cleanup_expired_sessions(self):
         """Remove expired sessions"""
         current_time = time.time()
         
-        if self.redis_client:
-            # Redis handles expiration automatically
-            pass
-        else:
-            expired = []
-            for session_id, session in self.local_sessions.items():
-                if current_time - session.last_activity > self.session_timeout:
-                    expired.append(session_id)
-            
-            for session_id in expired:
-                del self.local_sessions[session_id]
+        # Redis expires its copies itself; this drops the local ones
+        expired = []
+        for session_id, session in self.local_sessions.items():
+            if current_time - session.last_activity > self.session_timeout:
+                expired.append(session_id)
+        
+        for session_id in expired:
+            del self.local_sessions[session_id]
     
-    def _save_session(self, session: Session):
+    def _save_session(self, session: Session, new_track_entries: Optional[Dict[int, List[dict]]] = None):
         """Save session to storage"""
+        # Local storage, and the local cache in front of Redis
+        self.local_sessions[session.session_id] = session
+        
         if self.redis_client:
-            # Save to Redis with expiration
-            self.redis_client.setex(
-                f"session:{session.session_id}",
-                self.session_timeout,
-                json.dumps(session.to_dict())
-            )
-        else:
-            # Save to local storage
-            self.local_sessions[session.session_id] = session
+            # Queue for the next Redis flush
+            with self._pending_lock:
+                self._pending[session.session_id] = session
+                if new_track_entries:
+                    pending_tracks = self._pending_tracks.setdefault(session.session_id, {})
+                    for track_id, entries in new_track_entries.items():
+                        pending_tracks.setdefault(track_id, []).extend(entries)
+            self._start_flusher()
     
     def _load_session(self, session_id: str) -> Optional[Session]:
         """Load session from storage"""
-        if self.redis_client:
-            data = self.redis_client.get(f"session:{session_id}")
-            if data:
-                return Session.from_dict(json.loads(data))
+        session = self.local_sessions.get(session_id)
+        if session or not self.redis_client:
+            return session
+        
+        # Not seen by this process yet; rebuild it from Redis
+        key = f"session:{session_id}"
+        data = self.redis_client.hgetall(key)
+        if not data:
             return None
-        else:
-            return self.local_sessions.get(session_id)
\ No newline at end of file
+        
+        fields = {_decode(name): _decode(value) for name, value in data.items()}
+        track_history = {}
+        track_last_seen = {}
+        # ZRANGE returns members by ascending score, i.e. in last-seen order
+        for track_id, last_seen in self.redis_client.zrange(f"{key}:tracks", 0, -1, withscores=True):
+            track_id = _decode(track_id)
+            entries = self.redis_client.lrange(f"{key}:track:{track_id}", 0, -1)
+            track_history[int(track_id)] = deque(
+                (orjson.loads(entry) for entry in entries), maxlen=MAX_TRACK_HISTORY
+            )
+            track_last_seen[int(track_id)] = last_seen
+        
+        session = Session(
+            session_id=session_id,
+            created_at=float(fields['created_at']),
+            last_activity=float(fields['last_activity']),
+            frame_count=int(fields['frame_count']),
+            total_inference_time=float(fields['total_inference_time']),
+            track_history=track_history,
+            track_last_seen=track_last_seen
+        )
+        self.local_sessions[session_id] = session
+        return session
+    
+    def _start_flusher(self):
+        """Start the background flush thread on first use"""
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+            self._flusher.start()
+    
+    def _flush_loop(self):
+        last_track_flush = time.monotonic()
+        while not self._stop_flushing.wait(self.flush_interval):
+            include_tracks = time.monotonic() - last_track_flush >= self.track_flush_interval
+            if include_tracks:
+                last_track_flush = time.monotonic()
+            try:
+                self.flush(include_tracks)
+            except Exception as e:
+                print(f"Failed to flush sessions to Redis: {e}")
+    
+    def flush(self, include_tracks: bool = True):
+        """Write pending sessions to Redis in a single pipeline, optionally leaving track entries queued"""
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+            pending_tracks = {}
+            if include_tracks:
+                pending_tracks, self._pending_tracks = self._pending_tracks, {}
+        
+        if not (pending or pending_tracks) or not self.redis_client:
+            return
+        
+        pipe = self.redis_client.pipeline(transaction=False)
+        for session_id, session in pending.items():
+            key = f"session:{session_id}"
+            
+            # Save to Redis with expiration; the hash holds only the scalar fields
+            pipe.hset(key, mapping={name: getattr(session, name) for name in _SCALAR_FIELDS})
+            pipe.expire(key, self.session_timeout)
+        
+        for session_id, tracks in pending_tracks.items():
+            key = f"session:{session_id}"
+            pipe.zadd(f"{key}:tracks", {
+                track_id: entries[-1]['timestamp'] for track_id, entries in tracks.items()
+            })
+            pipe.expire(f"{key}:tracks", self.session_timeout)
+            
+            # Append only the new entries, then bound each list
+            for track_id, entries in tracks.items():
+                track_key = f"{key}:track:{track_id}"
+                pipe.rpush(track_key, *[orjson.dumps(entry, option=orjson.OPT_SERIALIZE_NUMPY) for entry in entries])
+                pipe.ltrim(track_key, -MAX_TRACK_HISTORY, -1)
+                pipe.expire(track_key, self.session_timeout)
+        pipe.execute()
+    
+    def close(self):
+        """Stop the flush thread and write out pending sessions"""
+        self._stop_flushing.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
+
+
+def _decode(value) -> str:
+    """Redis returns bytes unless the client was created with decode_responses"""
+    return value.decode() if isinstance(value, bytes) else str(value)
@@ -1,5 +1,5 @@
 import asyncio
-from typing import Dict, Any, Optional, List
+from typing import AsyncIterator, Dict, Any, Optional, List
 import numpy as np
 import cv2
 import base64
@@ -9,15 +9,21 @@ from concurrent.futures import ThreadPoolExecutor
 
 try:
     from ..config import config
+    from ..models.base_detector import BatchedDetector, DetectorWorker
     from ..models.detector_factory import DetectorFactory, ModelType
     from ..models.tracker import MultiObjectTracker
     from ..utils.image_processor import ImageProcessor
 except ImportError:
     from config import config
+    from models.base_detector import BatchedDetector, DetectorWorker
     from models.detector_factory import DetectorFactory, ModelType
     from models.tracker import MultiObjectTracker
     from utils.image_processor import ImageProcessor
 
+# Longer sides adaptive resolution steps between; a fixed set keeps the
+# detectors' per-shape caches and compiled graphs from growing per session
+LONG_EDGE_LADDER = (320, 480, 640, 960, 1280)
+
 class TrackingService:
     def __init__(self):
         self.detector = None
@@ -25,16 +31,18 @@ class TrackingService:
         self.image_processor = ImageProcessor()
         self.executor = ThreadPoolExecutor(max_workers=4)
         self.sessions: Dict[str, TrackingSession] = {}
+        # Loaded detectors by model type, and locks so each is only built once
+        self._detector_cache: Dict[ModelType, Any] = {}
+        self._detector_locks: Dict[ModelType, asyncio.Lock] = {}
+        # Session id -> longest frame side fed to the detector, adapted to inference time
+        self._target_long_edge: Dict[str, int] = {}
+        # One dedicated detection thread per detector
+        self._detector_workers: Dict[Any, DetectorWorker] = {}
         
     async def initialize(self):
         """Initialize service with default detector"""
-        self.detector = DetectorFactory.create_detector(
-            config.default_model,
-            device=str(config.device),
-            confidence_threshold=config.confidence_threshold,
-            iou_threshold=config.iou_threshold,
-            enable_fp16=config.enable_fp16
-        )
+        self.detector = self._create_detector(config.default_model)
+        self._detector_cache[config.default_model] = self.detector
         
         self.tracker = MultiObjectTracker(
             tracker_type=config.tracker_type,
@@ -47,39 +55,213 @@ class TrackingService:
         
         print(f"Tracking service initialized with {config.default_model}")
     
+    @staticmethod
+    def _create_detector(model_type: ModelType):
+        """Create a detector with the configured runtime options"""
+        return DetectorFactory.create_detector(
+            model_type,
+            device=str(config.device),
+            confidence_threshold=config.confidence_threshold,
+            iou_threshold=config.iou_threshold,
+            classes=['person'] if config.person_only else None,
+            enable_fp16=config.enable_fp16,
+            weights_dtype=config.weights_dtype,
+            int8=config.enable_int8,
+            compile=config.enable_torch_compile,
+            export=config.yolo_export,
+            batched=config.enable_dynamic_batching,
+            max_batch_size=config.max_batch_size,
+            batch_timeout=config.batch_timeout_ms / 1000
+        )
+    
+    async def _get_detector(self, model_type: ModelType):
+        """Return the shared detector for a model type, loading and warming it on first use"""
+        detector = self._detector_cache.get(model_type)
+        if detector is not None:
+            return detector
+        
+        lock = self._detector_locks.setdefault(model_type, asyncio.Lock())
+        async with lock:
+            # Another request may have loaded it while we waited
+            detector = self._detector_cache.get(model_type)
+            if detector is None:
+                loop = asyncio.get_running_loop()
+                detector = await loop.run_in_executor(self.executor, self._create_detector, model_type)
+                await loop.run_in_executor(self.executor, detector.warmup)
+                self._detector_cache[model_type] = detector
+        
+        return detector
+    
     async def process_frame(self, 
                           image_data: str, 
                           session_id: str,
                           model_type: Optional[ModelType] = None,
                           enable_tracking: bool = True) -> Dict[str, Any]:
-        """Process a single frame"""
+        """Process a single base64-encoded frame"""
         try:
-            # Decode image
-            frame = await self.image_processor.decode_base64(image_data)
-            
-            # Resize based on device
-            frame = self.image_processor.optimize_for_device(frame)
+            frame = self.image_processor.decode_base64(image_data)
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+        
+        return await self._process_decoded_frame(
+            frame, session_id, model_type, enable_tracking,
+            self.image_processor.encode_base64
+        )
+    
+    async def process_frame_bytes(self,
+                                  image_bytes: bytes,
+                                  session_id: str,
+                                  model_type: Optional[ModelType] = None,
+                                  enable_tracking: bool = True) -> Dict[str, Any]:
+        """Process a single frame given as raw JPEG/PNG bytes.
+        
+        The annotated frame is returned as raw JPEG bytes in 'image'.
+        """
+        try:
+            frame = self.image_processor.decode_bytes(image_bytes)
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+        
+        return await self._process_decoded_frame(
+            frame, session_id, model_type, enable_tracking,
+            self.image_processor.encode_jpeg
+        )
+    
+    async def process_stream(self,
+                             images: AsyncIterator[bytes],
+                             session_id: str,
+                             enable_tracking: bool = True) -> AsyncIterator[Dict[str, Any]]:
+        """Process a stream of JPEG/PNG frames as a two-stage pipeline.
+        
+        Decoding and detection of the next frame overlap tracking, drawing and
+        encoding of the current one. Results are yielded in frame order, with the
+        annotated frame as raw JPEG bytes in 'image'.
+        """
+        loop = asyncio.get_running_loop()
+        detected = asyncio.Queue()
+        # Frames past detection but not yet finished; bounds memory and latency
+        in_flight = asyncio.Semaphore(2)
+        
+        async def detect_stage():
+            try:
+                image_iter = aiter(images)
+                while True:
+                    # Take a slot before pulling the next frame, so a source that
+                    # drops old frames can keep replacing it while this stage waits
+                    await in_flight.acquire()
+                    try:
+                        image_bytes = await anext(image_iter)
+                    except StopAsyncIteration:
+                        return
+                    try:
+                        frame = await loop.run_in_executor(
+                            self.executor, self.image_processor.decode_bytes, image_bytes
+                        )
+                        detected.put_nowait(await self._detect(frame, None, session_id))
+                    except Exception as e:
+                        detected.put_nowait({'success': False, 'error': str(e)})
+            finally:
+                detected.put_nowait(None)
+        
+        producer = asyncio.create_task(detect_stage())
+        try:
+            while (item := await detected.get()) is not None:
+                if isinstance(item, dict):
+                    yield item
+                else:
+                    frame, result = item
+                    yield await self._finish_frame(
+                        frame, result, session_id, enable_tracking,
+                        self.image_processor.encode_jpeg
+                    )
+                in_flight.release()
             
-            # Run detection
-            if model_type and model_type != config.default_model:
-                # Use different detector for this request
-                detector = DetectorFactory.create_detector(
-                    model_type,
-                    device=str(config.device),
-                    confidence_threshold=config.confidence_threshold
-                )
-                result = await self._run_detection(detector, frame)
+            producer.result()  # Re-raise what ended the input stream
+        finally:
+            producer.cancel()
+    
+    async def _process_decoded_frame(self,
+                                     frame: np.ndarray,
+                                     session_id: str,
+                                     model_type: Optional[ModelType],
+                                     enable_tracking: bool,
+                                     encode_image) -> Dict[str, Any]:
+        """Run detection, tracking and drawing on a decoded frame"""
+        try:
+            frame, result = await self._detect(frame, model_type, session_id)
+            return await self._finish_frame(frame, result, session_id, enable_tracking, encode_image)
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+    
+    async def _detect(self, frame: np.ndarray, model_type: Optional[ModelType], session_id: str):
+        """Resize a decoded frame for the device and run detection on it"""
+        # Resize based on device, and smaller while the session's frames run over budget
+        frame = self.image_processor.optimize_for_device(
+            frame, long_edge=self._target_long_edge.get(session_id)
+        )
+        
+        # Run detection, with a different shared detector if the request asks for one
+        if model_type and model_type != config.default_model:
+            detector = await self._get_detector(model_type)
+        else:
+            detector = self.detector
+        result = await self._run_detection(detector, frame)
+        self._adapt_resolution(session_id, frame, result.inference_time)
+        
+        return frame, result
+    
+    def release_session(self, session_id: str) -> None:
+        """Forget the state kept for a finished session"""
+        self._target_long_edge.pop(session_id, None)
+        self.sessions.pop(session_id, None)
+    
+    def _adapt_resolution(self, session_id: str, frame: np.ndarray, inference_time: float):
+        """Step the session's frames down the ladder while inference is over budget, back up when well under"""
+        budget = config.frame_budget_ms / 1000
+        if budget <= 0:
+            return
+        
+        long_edge = max(frame.shape[:2])
+        target = self._target_long_edge.get(session_id)
+        if inference_time > budget:
+            smaller = [edge for edge in LONG_EDGE_LADDER if edge < long_edge]
+            if smaller:
+                self._target_long_edge[session_id] = smaller[-1]
+        elif target is not None and inference_time < budget * 0.45:
+            larger = [edge for edge in LONG_EDGE_LADDER if edge > target]
+            if long_edge < target or not larger:
+                # The device size limit (or the source) is smaller again; stop capping
+                del self._target_long_edge[session_id]
             else:
-                result = await self._run_detection(self.detector, frame)
-            
+                self._target_long_edge[session_id] = larger[0]
+    
+    async def _finish_frame(self,
+                            frame: np.ndarray,
+                            result,
+                            session_id: str,
+                            enable_tracking: bool,
+                            encode_image) -> Dict[str, Any]:
+        """Track, draw and encode a detected frame"""
+        try:
             # Apply tracking if enabled
             if enable_tracking and self.tracker:
                 tracked_detections = await self._run_tracking(frame, result.detections)
                 result.detections = tracked_detections
             
-            # Encode result image
-            output_frame = await self._draw_results(frame.copy(), result)
-            encoded_image = await self.image_processor.encode_base64(output_frame)
+            # Draw and encode the result image off the event loop
+            loop = asyncio.get_running_loop()
+            encoded_image = await loop.run_in_executor(
+                self.executor, self._render, frame, result, encode_image
+            )
             
             # Update session
             await self._update_session(session_id, result)
@@ -99,10 +281,22 @@ class TrackingService:
                 'error': str(e)
             }
     
+    def _render(self, frame: np.ndarray, result, encode_image):
+        """Draw results on the frame and encode it"""
+        # Tracking has already read the frame and nothing uses it afterwards, so draw in place
+        return encode_image(self._draw_results(frame, result))
+    
     async def _run_detection(self, detector, frame: np.ndarray):
-        """Run detection in thread pool"""
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(self.executor, detector.detect, frame)
+        """Run detection on the detector's worker thread"""
+        if isinstance(detector, BatchedDetector):
+            # Batches only fill when several frames call detect() at once
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(self.executor, detector.detect, frame)
+        
+        worker = self._detector_workers.get(detector)
+        if worker is None:
+            worker = self._detector_workers[detector] = DetectorWorker(detector)
+        return await worker.detect(frame)
     
     async def _run_tracking(self, frame: np.ndarray, detections: List):
         """Run tracking in thread pool"""
@@ -113,7 +307,7 @@ class TrackingService:
             detections, frame
         )
     
-    async def _draw_results(self, frame: np.ndarray, result) -> np.ndarray:
+    def _draw_results(self, frame: np.ndarray, result) -> np.ndarray:
         """Draw detections and tracks on frame"""
         # Draw bounding boxes
         for det in result.detections:
@@ -154,17 +348,58 @@ class TrackingService:
         session = self.sessions[session_id]
         session.add_frame_result(result)
 
+class TrackHistory:
+    """Most recent entries of a track as parallel ring-buffer arrays"""
+    
+    CAPACITY = 256
+    
+    def __init__(self):
+        self.bboxes = np.empty((self.CAPACITY, 4), dtype=np.float32)
+        self.confidences = np.empty(self.CAPACITY, dtype=np.float32)
+        self.timestamps = np.empty(self.CAPACITY, dtype=np.float64)
+        self.head = 0  # Next slot to write
+        self.count = 0
+    
+    def append(self, bbox, confidence: float, timestamp: float):
+        i = self.head
+        self.bboxes[i] = bbox[:4]
+        self.confidences[i] = confidence
+        self.timestamps[i] = timestamp
+        self.head = (i + 1) % self.CAPACITY
+        self.count = min(self.count + 1, self.CAPACITY)
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def _ordered(self, buffer: np.ndarray) -> np.ndarray:
+        """Filled part of a ring buffer, oldest first"""
+        if self.count < self.CAPACITY:
+            return buffer[:self.count]
+        return np.concatenate((buffer[self.head:], buffer[:self.head]))
+    
+    def to_list(self) -> List[Dict[str, Any]]:
+        """History as {timestamp, bbox, confidence} dicts, oldest first"""
+        return [
+            {'timestamp': timestamp, 'bbox': bbox, 'confidence': confidence}
+            for timestamp, bbox, confidence in zip(
+                self._ordered(self.timestamps).tolist(),
+                self._ordered(self.bboxes).tolist(),
+                self._ordered(self.confidences).tolist()
+            )
+        ]
+
 class TrackingSession:
     def __init__(self, session_id: str):
         self.session_id = session_id
         self.start_time = time.time()
         self.frame_results = []
-        self.track_history = {}
+        self.track_history: Dict[int, TrackHistory] = {}
     
     def add_frame_result(self, result):
         """Add frame result to session history"""
+        timestamp = time.time()
         self.frame_results.append({
-            'timestamp': time.time(),
+            'timestamp': timestamp,
             'detection_count': len(result.detections),
             'inference_time': result.inference_time
         })
@@ -172,11 +407,8 @@ class TrackingSession:
         # Update track history
         for det in result.detections:
             if det.track_id:
-                if det.track_id not in self.track_history:
-                    self.track_history[det.track_id] = []
+                history = self.track_history.get(det.track_id)
+                if history is None:
+                    history = self.track_history[det.track_id] = TrackHistory()
                 
-                self.track_history[det.track_id].append({
-                    'timestamp': time.time(),
-                    'bbox': det.bbox,
-                    'confidence': det.confidence
-                })
\ No newline at end of file
+                history.append(det.bbox, det.confidence, timestamp)
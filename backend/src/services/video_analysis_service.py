@@ -3,28 +3,72 @@ Video Analysis Service
 Analyzes video frames to detect exercises and provide form feedback
 """
 
+import asyncio
 import logging
-from typing import Dict, List, Optional, Any
+import math
+import queue
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Any
 import numpy as np
 import cv2
 from dataclasses import dataclass, asdict
 
 logger = logging.getLogger(__name__)
 
+# Marks the end of a pipeline stage's output
+_END_OF_STREAM = object()
 
-@dataclass
+# Let FFmpeg decode on the GPU / VA-API when available; falls back to software silently
+_CAPTURE_PARAMS = [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+
+# Consecutive frames handed to one pose worker together, so a tracking-mode
+# detector sees runs of neighbouring frames instead of every Nth frame
+_POSE_CHUNK_SIZE = 8
+
+# Frames are compared for near-duplicates at this size
+_THUMBNAIL_SIZE = (32, 32)
+
+
+def _format_poses(poses: List[Dict]) -> List[Dict]:
+    """Format poses for JSON serialization, turning landmark arrays into dicts"""
+    formatted = []
+    for pose in poses:
+        landmarks = pose.get("landmarks")
+        formatted.append({
+            "landmarks": [
+                {"id": idx, "x": x, "y": y, "z": z, "visibility": visibility}
+                for idx, (x, y, z, visibility) in enumerate(landmarks.tolist())
+            ] if landmarks is not None else [],
+            "confidence": pose.get("confidence", 0.0)
+        })
+    return formatted
+
+
+@dataclass(slots=True)
 class FrameAnalysis:
     """Analysis result for a single frame"""
     frame_number: int
     timestamp: float
     people_detected: int
-    poses: List[Dict]
+    poses: List[Dict]  # Landmarks kept as float32 [N, 4] arrays until serialized
     issues: List[Dict]
     exercise_type: Optional[str] = None
     form_score: float = 0.0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        # Built directly: asdict() would deep-copy every pose and issue
+        return {
+            "frame_number": self.frame_number,
+            "timestamp": self.timestamp,
+            "people_detected": self.people_detected,
+            "poses": _format_poses(self.poses),
+            "issues": self.issues,
+            "form_score": self.form_score,
+            "exercise_type": self.exercise_type
+        }
 
 
-@dataclass
+@dataclass(slots=True)
 class VideoAnalysisResult:
     """Complete analysis result for a video"""
     total_frames: int
@@ -33,7 +77,7 @@ class VideoAnalysisResult:
     fps: float
     detected_exercise: Optional[str] = None
     overall_form_score: float = 0.0
-    frame_analyses: List[Dict] = None
+    frame_analyses: List[FrameAnalysis] = None
     summary: Dict = None
     
     def __post_init__(self):
@@ -46,88 +90,283 @@ class VideoAnalysisResult:
 class VideoAnalysisService:
     """Service for analyzing video frames"""
     
-    def __init__(self, pose_detector, exercise_analyzer):
+    def __init__(self, pose_detector, exercise_analyzer,
+                 pose_workers: int = 1, pose_detector_factory=None,
+                 duplicate_threshold: float = 0.0):
         """
         Initialize video analysis service
         
         Args:
             pose_detector: Pose detection model
             exercise_analyzer: Exercise analysis model
+            pose_workers: Number of frames to run pose detection on in parallel
+            pose_detector_factory: Callable creating extra detectors for parallel
+                workers; without it detection stays on ``pose_detector`` alone
+            duplicate_threshold: Mean per-pixel difference (0-255) between 32x32
+                thumbnails below which a frame reuses the previous frame's poses;
+                0 runs pose detection on every frame
         """
         self.pose_detector = pose_detector
         self.exercise_analyzer = exercise_analyzer
         self.analysis_results = []
+        self.pose_workers = max(1, pose_workers)
+        self.pose_detector_factory = pose_detector_factory
+        self.duplicate_threshold = duplicate_threshold
+        
+        # MediaPipe graphs are not thread-safe, so each detector is checked out
+        # by one worker at a time. The pool is shared across requests.
+        self._detector_pool = queue.Queue()
+        self._detector_pool.put(pose_detector)
+        self._detector_count = 1
+        self._detector_lock = threading.Lock()
     
-    async def analyze_frames(self, frames: List[np.ndarray], 
+    def _acquire_detector(self, stop: threading.Event):
+        """Check out an idle pose detector, creating one if the pool may grow"""
+        try:
+            return self._detector_pool.get_nowait()
+        except queue.Empty:
+            pass
+        
+        with self._detector_lock:
+            can_grow = (self.pose_detector_factory is not None
+                        and self._detector_count < self.pose_workers)
+            if can_grow:
+                self._detector_count += 1
+        
+        if can_grow:
+            try:
+                return self.pose_detector_factory()
+            except Exception:
+                with self._detector_lock:
+                    self._detector_count -= 1
+                raise
+        
+        while not stop.is_set():
+            try:
+                return self._detector_pool.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return None
+    
+    def _release_detector(self, detector) -> None:
+        """Return a checked-out pose detector to the pool"""
+        self._detector_pool.put(detector)
+    
+    async def analyze_frames(self, frames: Iterable[np.ndarray], 
                            exercise_type: Optional[str] = None,
-                           callback=None) -> VideoAnalysisResult:
+                           callback=None,
+                           total_frames: Optional[int] = None,
+                           queue_size: int = 8) -> VideoAnalysisResult:
         """
         Analyze multiple video frames
         
+        Runs as a three-stage pipeline: frames are pulled from ``frames`` in a
+        reader thread, poses are detected by ``pose_workers`` threads each
+        holding its own detector, and form analysis runs on the event loop in
+        frame order. The reader only pulls a frame while fewer than
+        ``queue_size`` frames plus a chunk per pose worker (and one queued
+        chunk) are in flight, counting results held back for reordering, so a
+        lazy frame generator keeps a bounded number of frames in memory even
+        when one worker falls behind.
+        Pose workers take consecutive frames in chunks, which keeps
+        MediaPipe's landmark tracking between frames effective; ``frames``
+        must therefore be in capture order.
+        
         Args:
-            frames: List of frame arrays
+            frames: List or iterator of frame arrays
             exercise_type: Optional exercise type to analyze for
             callback: Optional callback function for progress updates
+            total_frames: Expected frame count for progress (defaults to len(frames))
+            queue_size: Maximum frames buffered between pipeline stages
             
         Returns:
             VideoAnalysisResult with analysis data
         """
-        try:
+        if total_frames is None and hasattr(frames, '__len__'):
             total_frames = len(frames)
+        
+        chunk_size = min(_POSE_CHUNK_SIZE, queue_size)
+        frame_q = queue.Queue(maxsize=max(1, queue_size // chunk_size))
+        analysis_q = queue.Queue(maxsize=queue_size)
+        stop = threading.Event()
+        
+        num_workers = self.pose_workers if self.pose_detector_factory else 1
+        # Frames pulled from ``frames`` but not yet through form analysis
+        in_flight = threading.Semaphore(chunk_size * (num_workers + 1) + queue_size)
+        
+        def put(q: queue.Queue, item) -> bool:
+            # Retry with a timeout so producers exit if the consumer stops early
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def get(q: queue.Queue):
+            while not stop.is_set():
+                try:
+                    return q.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+            return _END_OF_STREAM
+        
+        def read_stage():
+            try:
+                chunk = []
+                frame_iter = iter(frames)
+                index = 0
+                while True:
+                    # Wait for a slot before decoding, so a stalled worker caps the backlog
+                    while not in_flight.acquire(timeout=0.1):
+                        if stop.is_set():
+                            return
+                    frame = next(frame_iter, _END_OF_STREAM)
+                    if frame is _END_OF_STREAM:
+                        break
+                    chunk.append((index, frame))
+                    index += 1
+                    if len(chunk) == chunk_size:
+                        if not put(frame_q, chunk):
+                            return
+                        chunk = []
+                if chunk and not put(frame_q, chunk):
+                    return
+            except Exception as e:
+                put(frame_q, e)
+                return
+            for _ in range(num_workers):
+                put(frame_q, _END_OF_STREAM)
+        
+        def pose_stage():
+            detector = None
+            try:
+                detector = self._acquire_detector(stop)
+                if detector is None:
+                    return
+                # Pooled detectors still track landmarks from the previous video
+                if hasattr(detector, 'reset'):
+                    detector.reset()
+                while True:
+                    item = get(frame_q)
+                    if item is _END_OF_STREAM or isinstance(item, Exception):
+                        put(analysis_q, item)
+                        return
+                    # A chunk holds consecutive frames, so a held pose repeats within it
+                    last_thumbnail, last_poses = None, None
+                    for index, frame in item:
+                        thumbnail = self._duplicate_thumbnail(frame)
+                        if self._is_duplicate(thumbnail, last_thumbnail):
+                            poses = last_poses
+                        else:
+                            poses, _ = self._detect_poses(frame, detector)
+                            last_thumbnail, last_poses = thumbnail, poses
+                        if not put(analysis_q, (index, frame, poses)):
+                            return
+            except Exception as e:
+                put(analysis_q, e)
+            finally:
+                if detector is not None:
+                    self._release_detector(detector)
+        
+        workers = [threading.Thread(target=read_stage, daemon=True)]
+        workers += [
+            threading.Thread(target=pose_stage, daemon=True)
+            for _ in range(num_workers)
+        ]
+        for worker in workers:
+            worker.start()
+        
+        try:
+            loop = asyncio.get_event_loop()
             frame_analyses = []
             form_scores = []
             detected_exercises = {}
             issues_summary = {"critical": 0, "warning": 0, "info": 0}
+            idx = 0
+            finished_workers = 0
+            # Workers finish out of order; hold results until their turn
+            pending = {}
+            
+            async def report_progress(people_detected: int):
+                nonlocal reported
+                reported = idx
+                expected = max(total_frames or 0, idx)
+                await callback({
+                    "progress": idx / expected * 100,
+                    "current_frame": idx,
+                    "total_frames": expected,
+                    "people_detected": people_detected
+                })
             
-            for idx, frame in enumerate(frames):
-                # Detect poses in frame
-                poses, confidence = self._detect_poses(frame)
+            # Report about every 5% of the expected frames rather than per frame
+            progress_step = max(1, math.ceil((total_frames or 0) / 20))
+            next_progress = progress_step
+            reported = 0
+            people_detected = 0
+            
+            while finished_workers < num_workers:
+                item = await loop.run_in_executor(None, get, analysis_q)
+                if item is _END_OF_STREAM:
+                    finished_workers += 1
+                    continue
+                if isinstance(item, Exception):
+                    raise item
                 
-                # Analyze exercise form if poses detected
-                issues = []
-                form_score = 100.0
+                index, frame, poses = item
+                pending[index] = (frame, poses)
                 
-                if poses and exercise_type:
-                    issues, form_score = self._analyze_exercise_form(
-                        poses, exercise_type, frame
-                    )
+                while idx in pending:
+                    frame, poses = pending.pop(idx)
                     
-                    # Track exercise detection
-                    if exercise_type not in detected_exercises:
-                        detected_exercises[exercise_type] = 0
-                    detected_exercises[exercise_type] += 1
+                    # Analyze exercise form if poses detected
+                    issues = []
+                    form_score = 100.0
                     
-                    # Accumulate scores
-                    form_scores.append(form_score)
-                
-                # Count issue severity
-                for issue in issues:
-                    severity = issue.get("severity", "info").lower()
-                    if severity in issues_summary:
-                        issues_summary[severity] += 1
-                
-                # Create frame analysis
-                frame_analysis = {
-                    "frame_number": idx,
-                    "timestamp": idx / 30.0,  # Assume 30 FPS
-                    "people_detected": len(poses) if poses else 0,
-                    "poses": self._format_poses(poses),
-                    "issues": issues,
-                    "form_score": form_score if poses else 0.0,
-                    "exercise_type": exercise_type
-                }
-                
-                frame_analyses.append(frame_analysis)
-                
-                # Progress callback
-                if callback:
-                    progress = (idx + 1) / total_frames * 100
-                    await callback({
-                        "progress": progress,
-                        "current_frame": idx + 1,
-                        "total_frames": total_frames,
-                        "people_detected": len(poses) if poses else 0
-                    })
+                    if poses and exercise_type:
+                        issues, form_score = self._analyze_exercise_form(
+                            poses, exercise_type, frame
+                        )
+                    
+                        # Track exercise detection
+                        if exercise_type not in detected_exercises:
+                            detected_exercises[exercise_type] = 0
+                        detected_exercises[exercise_type] += 1
+                    
+                        # Accumulate scores
+                        form_scores.append(form_score)
+                    
+                    # Count issue severity
+                    for issue in issues:
+                        severity = issue.get("severity", "info").lower()
+                        if severity in issues_summary:
+                            issues_summary[severity] += 1
+                    
+                    # Create frame analysis
+                    people_detected = len(poses) if poses else 0
+                    frame_analyses.append(FrameAnalysis(
+                        frame_number=idx,
+                        timestamp=idx / 30.0,  # Assume 30 FPS
+                        people_detected=people_detected,
+                        poses=poses,
+                        issues=issues,
+                        form_score=form_score if poses else 0.0,
+                        exercise_type=exercise_type
+                    ))
+                    idx += 1
+                    in_flight.release()
+                    
+                    # Progress callback
+                    if callback and idx >= next_progress:
+                        next_progress = idx + progress_step
+                        await report_progress(people_detected)
+            
+            # Always report the last frame
+            if callback and idx > reported:
+                await report_progress(people_detected)
+            
+            total_frames = len(frame_analyses)
             
             # Calculate overall results
             overall_form_score = np.mean(form_scores) if form_scores else 0.0
@@ -157,64 +396,97 @@ class VideoAnalysisService:
         except Exception as e:
             logger.error(f"Error analyzing frames: {str(e)}")
             raise
+        
+        finally:
+            stop.set()
 
     async def analyze_video_file(self, video_path: str, exercise_type: Optional[str] = None, max_seconds: int = 10,
                                  sample_rate: float = 2.0, callback=None) -> VideoAnalysisResult:
         """Analyze a local video file by sampling frames"""
-        cap = None
         try:
             cap = cv2.VideoCapture(video_path)
-            if not cap.isOpened():
-                raise ValueError(f"Cannot open video file: {video_path}")
+            try:
+                if not cap.isOpened():
+                    raise ValueError(f"Cannot open video file: {video_path}")
+
+                fps = cap.get(cv2.CAP_PROP_FPS) if cap.get(cv2.CAP_PROP_FPS) > 0 else 30.0
+                total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+            finally:
+                cap.release()
 
-            fps = cap.get(cv2.CAP_PROP_FPS) if cap.get(cv2.CAP_PROP_FPS) > 0 else 30.0
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
             max_frames = min(total_frames, int(max_seconds * fps)) if total_frames > 0 else int(max_seconds * fps)
             frame_interval = max(1, int(fps // sample_rate))
+            expected_frames = min(max_frames, -(-total_frames // frame_interval)) if total_frames > 0 else None
 
-            frames = []
-            frame_idx = 0
-            collected = 0
-
-            while cap.isOpened() and collected < max_frames:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-
-                if frame_idx % frame_interval == 0:
-                    # Resize and normalize
-                    frame_resized = cv2.resize(frame, (640, 480))
-                    frames.append(frame_resized)
-                    collected += 1
-
-                frame_idx += 1
+            # Frames are decoded lazily by the pipeline's reader thread, so only
+            # the frames in flight are held in memory
+            frames = self._iter_sampled_frames(video_path, frame_interval, max_frames)
+            analysis_result = await self.analyze_frames(
+                frames, exercise_type=exercise_type, callback=callback, total_frames=expected_frames
+            )
 
-            if not frames:
+            if not analysis_result.analyzed_frames:
                 raise ValueError("No frames extracted from video file")
 
-            analysis_result = await self.analyze_frames(frames, exercise_type=exercise_type, callback=callback)
             return analysis_result
 
         except Exception as e:
             logger.error(f"Error analyzing video file: {str(e)}")
             raise
+    
+    @staticmethod
+    def _iter_sampled_frames(video_path: str, frame_interval: int, max_frames: int) -> Iterator[np.ndarray]:
+        """Yield every frame_interval-th frame resized to 640x480, at most max_frames of them"""
+        cap = cv2.VideoCapture(video_path, cv2.CAP_FFMPEG, _CAPTURE_PARAMS)
+        try:
+            frame_idx = 0
+            collected = 0
 
+            while cap.isOpened() and collected < max_frames:
+                if frame_idx % frame_interval == 0:
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+
+                    # Resize and normalize
+                    yield cv2.resize(frame, (640, 480))
+                    collected += 1
+                elif not cap.grab():
+                    # Skipped frames are decoded but never converted to BGR
+                    break
+
+                frame_idx += 1
         finally:
-            if cap is not None:
-                cap.release()
+            cap.release()
+    
+    def _duplicate_thumbnail(self, frame: np.ndarray) -> Optional[np.ndarray]:
+        """Downscale a frame for near-duplicate checks, or None when they are disabled"""
+        if self.duplicate_threshold <= 0:
+            return None
+        return cv2.resize(frame, _THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
     
-    def _detect_poses(self, frame: np.ndarray) -> tuple:
+    def _is_duplicate(self, thumbnail: Optional[np.ndarray],
+                      last_thumbnail: Optional[np.ndarray]) -> bool:
+        """Whether a frame barely differs from the last frame poses were detected on"""
+        if thumbnail is None or last_thumbnail is None:
+            return False
+        difference = cv2.norm(thumbnail, last_thumbnail, cv2.NORM_L1)
+        return difference < self.duplicate_threshold * thumbnail.size
+    
+    def _detect_poses(self, frame: np.ndarray, detector) -> tuple:
         """
         Detect poses in a frame
         
         Args:
             frame: Image frame
+            detector: Pose detector to use, checked out by the caller
             
         Returns:
-            Tuple of (poses_list, confidence)
+            Tuple of (poses_list, confidence); each pose's landmarks are a
+            float32 [N, 4] array of x, y, z, visibility rows
         """
         try:
-            pose_landmarks_list = self.pose_detector.detect(frame)
+            pose_landmarks_list = detector.detect(frame)
             
             if not pose_landmarks_list:
                 return [], 0.0
@@ -223,18 +495,15 @@ class VideoAnalysisService:
             total_confidence = 0.0
             
             for pose_landmarks in pose_landmarks_list:
-                pose_data = []
-                for landmark in pose_landmarks.landmarks:
-                    pose_data.append({
-                        "id": landmark.get("id"),
-                        "x": landmark["x"],
-                        "y": landmark["y"],
-                        "z": landmark.get("z", 0.0),
-                        "visibility": landmark.get("visibility", 1.0)
-                    })
+                landmarks = pose_landmarks.array
+                if landmarks is None:
+                    landmarks = np.array([
+                        (landmark["x"], landmark["y"], landmark.get("z", 0.0), landmark.get("visibility", 1.0))
+                        for landmark in pose_landmarks.landmarks
+                    ], dtype=np.float32).reshape(-1, 4)
                 
                 poses.append({
-                    "landmarks": pose_data,
+                    "landmarks": landmarks,
                     "confidence": pose_landmarks.confidence
                 })
                 total_confidence += pose_landmarks.confidence
@@ -268,8 +537,8 @@ class VideoAnalysisService:
                 return issues, 0.0
             
             # Get landmarks from first pose
-            landmarks = poses[0].get("landmarks", [])
-            if not landmarks:
+            landmarks = poses[0].get("landmarks")
+            if landmarks is None or not len(landmarks):
                 return issues, 0.0
             
             # Analyze based on exercise type
@@ -291,7 +560,7 @@ class VideoAnalysisService:
             logger.error(f"Error analyzing exercise form: {str(e)}")
             return [], 0.0
     
-    def _analyze_squat(self, landmarks: List[Dict]) -> tuple:
+    def _analyze_squat(self, landmarks: np.ndarray) -> tuple:
         """Analyze squat form"""
         issues = []
         score = 100.0
@@ -304,14 +573,17 @@ class VideoAnalysisService:
             if len(landmarks) < 27:
                 return issues, 0.0
             
-            # Check if knees go past toes
-            left_ankle = landmarks[27] if len(landmarks) > 27 else landmarks[25]
-            right_ankle = landmarks[28] if len(landmarks) > 28 else landmarks[26]
-            left_knee = landmarks[25]
-            right_knee = landmarks[26]
+            # Landmark rows are x, y, z, visibility; item() reads each value
+            # once as a Python float instead of indexing a row per use
+            item = landmarks.item
+            left_shoulder_x = item(11, 0)
+            left_hip_x, left_hip_y = item(23, 0), item(23, 1)
+            left_knee_y = item(25, 1)
+            left_ankle_y = item(27, 1) if len(landmarks) > 27 else left_knee_y
             
+            # Check if knees go past toes
             # Verify knee angle (simplified check)
-            if left_knee['y'] > left_ankle['y'] - 0.1:
+            if left_knee_y > left_ankle_y - 0.1:
                 issues.append({
                     "severity": "warning",
                     "message": "Left knee extends too far forward",
@@ -320,9 +592,7 @@ class VideoAnalysisService:
                 score -= 15
             
             # Check back alignment
-            left_shoulder = landmarks[11]
-            left_hip = landmarks[23]
-            if abs(left_shoulder['x'] - left_hip['x']) > 0.15:
+            if abs(left_shoulder_x - left_hip_x) > 0.15:
                 issues.append({
                     "severity": "warning",
                     "message": "Back is not properly aligned",
@@ -331,7 +601,7 @@ class VideoAnalysisService:
                 score -= 10
             
             # Check depth
-            hip_to_knee = abs(landmarks[23]['y'] - landmarks[25]['y'])
+            hip_to_knee = abs(left_hip_y - left_knee_y)
             if hip_to_knee > 0.3:
                 issues.append({
                     "severity": "info",
@@ -345,7 +615,7 @@ class VideoAnalysisService:
         
         return issues, max(score, 0.0)
     
-    def _analyze_pushup(self, landmarks: List[Dict]) -> tuple:
+    def _analyze_pushup(self, landmarks: np.ndarray) -> tuple:
         """Analyze pushup form"""
         issues = []
         score = 100.0
@@ -354,13 +624,13 @@ class VideoAnalysisService:
             if len(landmarks) < 27:
                 return issues, 0.0
             
-            # Check body alignment
-            shoulder = landmarks[11]
-            hip = landmarks[23]
-            knee = landmarks[25] if len(landmarks) > 25 else landmarks[24]
+            item = landmarks.item
+            shoulder_y, shoulder_z = item(11, 1), item(11, 2)
+            hip_y = item(23, 1)
             
+            # Check body alignment
             # Verify straight body line
-            shoulder_hip_diff = abs(shoulder['y'] - hip['y'])
+            shoulder_hip_diff = abs(shoulder_y - hip_y)
             if shoulder_hip_diff > 0.2:
                 issues.append({
                     "severity": "critical",
@@ -370,7 +640,6 @@ class VideoAnalysisService:
                 score -= 25
             
             # Check elbow angle
-            shoulder_z = shoulder.get('z', 0)
             if shoulder_z > 0.1:
                 issues.append({
                     "severity": "warning",
@@ -384,7 +653,7 @@ class VideoAnalysisService:
         
         return issues, max(score, 0.0)
     
-    def _analyze_lunge(self, landmarks: List[Dict]) -> tuple:
+    def _analyze_lunge(self, landmarks: np.ndarray) -> tuple:
         """Analyze lunge form"""
         issues = []
         score = 100.0
@@ -393,13 +662,15 @@ class VideoAnalysisService:
             if len(landmarks) < 27:
                 return issues, 0.0
             
-            # Check knee alignment
-            left_knee = landmarks[25]
-            right_knee = landmarks[26]
-            left_ankle = landmarks[27] if len(landmarks) > 27 else landmarks[25]
+            item = landmarks.item
+            left_shoulder_x = item(11, 0)
+            left_hip_x = item(23, 0)
+            left_knee_y = item(25, 1)
+            left_ankle_y = item(27, 1) if len(landmarks) > 27 else left_knee_y
             
+            # Check knee alignment
             # Front knee should be above ankle
-            if left_knee['y'] < left_ankle['y'] - 0.05:
+            if left_knee_y < left_ankle_y - 0.05:
                 issues.append({
                     "severity": "warning",
                     "message": "Front knee extends past ankle",
@@ -408,9 +679,7 @@ class VideoAnalysisService:
                 score -= 15
             
             # Check back alignment
-            left_shoulder = landmarks[11]
-            left_hip = landmarks[23]
-            if abs(left_shoulder['x'] - left_hip['x']) > 0.1:
+            if abs(left_shoulder_x - left_hip_x) > 0.1:
                 issues.append({
                     "severity": "info",
                     "message": "Try to keep your torso upright",
@@ -423,7 +692,7 @@ class VideoAnalysisService:
         
         return issues, max(score, 0.0)
     
-    def _analyze_plank(self, landmarks: List[Dict]) -> tuple:
+    def _analyze_plank(self, landmarks: np.ndarray) -> tuple:
         """Analyze plank form"""
         issues = []
         score = 100.0
@@ -432,15 +701,16 @@ class VideoAnalysisService:
             if len(landmarks) < 27:
                 return issues, 0.0
             
-            # Check body alignment
-            shoulder = landmarks[11]
-            hip = landmarks[23]
-            knee = landmarks[25]
-            ankle = landmarks[27] if len(landmarks) > 27 else landmarks[25]
+            item = landmarks.item
+            nose_y = item(0, 1)
+            shoulder_y = item(11, 1)
+            hip_y = item(23, 1)
+            knee_y = item(25, 1)
             
+            # Check body alignment
             # All should be in roughly same line
-            shoulder_hip_diff = abs(shoulder['y'] - hip['y'])
-            hip_knee_diff = abs(hip['y'] - knee['y'])
+            shoulder_hip_diff = abs(shoulder_y - hip_y)
+            hip_knee_diff = abs(hip_y - knee_y)
             
             if shoulder_hip_diff > 0.15 or hip_knee_diff > 0.15:
                 issues.append({
@@ -451,8 +721,7 @@ class VideoAnalysisService:
                 score -= 30
             
             # Check head position
-            nose = landmarks[0]
-            if nose['y'] < shoulder['y'] - 0.1:
+            if nose_y < shoulder_y - 0.1:
                 issues.append({
                     "severity": "info",
                     "message": "Head position could be better",
@@ -465,17 +734,15 @@ class VideoAnalysisService:
         
         return issues, max(score, 0.0)
     
-    def _generic_exercise_analysis(self, landmarks: List[Dict]) -> tuple:
+    def _generic_exercise_analysis(self, landmarks: np.ndarray) -> tuple:
         """Generic exercise analysis for unknown types"""
         issues = []
         score = 75.0
         
         try:
             # Check overall pose quality
-            visibility_scores = [l.get('visibility', 0) for l in landmarks if 'visibility' in l]
-            
-            if visibility_scores:
-                avg_visibility = np.mean(visibility_scores)
+            if len(landmarks):
+                avg_visibility = landmarks[:, 3].mean()
                 if avg_visibility < 0.5:
                     issues.append({
                         "severity": "warning",
@@ -489,24 +756,14 @@ class VideoAnalysisService:
         
         return issues, max(score, 0.0)
     
-    def _format_poses(self, poses: List[Dict]) -> List[Dict]:
-        """Format poses for JSON serialization"""
-        formatted = []
-        for pose in poses:
-            formatted.append({
-                "landmarks": pose.get("landmarks", []),
-                "confidence": pose.get("confidence", 0.0)
-            })
-        return formatted
-    
-    def _create_summary(self, frame_analyses: List[Dict],
+    def _create_summary(self, frame_analyses: List[FrameAnalysis],
                        overall_score: float,
                        issues_summary: Dict,
                        exercise_type: Optional[str]) -> Dict:
         """Create analysis summary"""
         
-        frames_with_people = sum(1 for f in frame_analyses if f['people_detected'] > 0)
-        avg_form_score = np.mean([f['form_score'] for f in frame_analyses if f['form_score'] > 0]) if frame_analyses else 0.0
+        frames_with_people = sum(1 for f in frame_analyses if f.people_detected > 0)
+        avg_form_score = np.mean([f.form_score for f in frame_analyses if f.form_score > 0]) if frame_analyses else 0.0
         
         # Determine recommendations
         recommendations = []
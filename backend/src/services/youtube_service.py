@@ -3,17 +3,54 @@ YouTube Video Fetching and Processing Service
 Handles downloading and processing YouTube videos for analysis
 """
 
+import copy
 import os
 import tempfile
 import asyncio
 import logging
-from typing import Optional, Dict, Tuple
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Iterator, Tuple
+from urllib.parse import parse_qs, urlparse
 import yt_dlp
 import cv2
+import numpy as np
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# Let FFmpeg decode on the GPU / VA-API when available; falls back to software silently
+_CAPTURE_PARAMS = [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+
+_INFO_OPTS = {
+    'quiet': True,
+    'no_warnings': True,
+    'socket_timeout': 30,
+}
+_DOWNLOAD_OPTS = {**_INFO_OPTS, 'format': 'best[ext=mp4]'}
+
+# Video metadata kept per canonical URL, least recently used evicted first
+_INFO_CACHE_SIZE = 256
+
+
+def _canonical_url(url: str) -> str:
+    """Map the youtu.be, shorts and watch URL forms of a video to one watch URL, dropping extra params"""
+    parsed = urlparse(url.strip())
+    host = parsed.netloc.lower()
+    if host.startswith('www.') or host.startswith('m.'):
+        host = host.split('.', 1)[1]
+    
+    video_id = None
+    if host == 'youtu.be':
+        video_id = parsed.path.lstrip('/').split('/')[0]
+    elif host == 'youtube.com':
+        if parsed.path == '/watch':
+            video_id = parse_qs(parsed.query).get('v', [None])[0]
+        elif parsed.path.startswith('/shorts/'):
+            video_id = parsed.path[len('/shorts/'):].split('/')[0]
+    
+    return f"https://www.youtube.com/watch?v={video_id}" if video_id else url
+
 
 class YouTubeService:
     """Service for fetching and processing YouTube videos"""
@@ -27,6 +64,21 @@ class YouTubeService:
         """
         self.temp_dir = temp_dir or tempfile.gettempdir()
         self.downloaded_videos = {}
+        # YoutubeDL instances per executor thread; building one loads every extractor
+        self._ydl_local = threading.local()
+        self._info_cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self._info_cache_lock = threading.Lock()
+    
+    def _ydl(self, download: bool) -> yt_dlp.YoutubeDL:
+        """This thread's reusable YoutubeDL for downloads or info lookups (instances aren't thread-safe)"""
+        attr = 'download' if download else 'info'
+        ydl = getattr(self._ydl_local, attr, None)
+        if ydl is None:
+            # YoutubeDL keeps (and mutates) the params dict it is given; copy it so
+            # one thread retargeting its output template can't move another's download
+            ydl = yt_dlp.YoutubeDL(copy.deepcopy(_DOWNLOAD_OPTS if download else _INFO_OPTS))
+            setattr(self._ydl_local, attr, ydl)
+        return ydl
         
     async def fetch_video(self, url: str, max_duration: int = 600) -> Tuple[bool, str, Optional[str]]:
         """
@@ -66,48 +118,49 @@ class YouTubeService:
             Tuple of (success, file_path, error_message)
         """
         try:
+            # Metadata from an earlier lookup rejects long videos without downloading anything
+            cached = self._cached_info(url)
+            if cached is not None and (cached["duration"] or 0) > max_duration:
+                return False, "", f"Video duration ({cached['duration']}s) exceeds maximum ({max_duration}s)"
+            
             # Create unique filename with timestamp
             import time
             timestamp = int(time.time() * 1000)
             output_path = os.path.join(self.temp_dir, f"youtube_{timestamp}.mp4")
             
-            ydl_opts = {
-                'format': 'best[ext=mp4]',
-                'outtmpl': output_path[:-4],  # Remove .mp4 extension
-                'quiet': True,
-                'no_warnings': True,
-                'socket_timeout': 30,
-            }
+            ydl = self._ydl(download=True)
+            # YoutubeDL normalizes outtmpl to a dict at construction; retarget the main template
+            ydl.params['outtmpl']['default'] = output_path[:-4]  # Remove .mp4 extension
             
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                logger.info(f"Downloading video from: {url}")
-                info = ydl.extract_info(url, download=True)
-                duration = info.get('duration', 0)
-                
-                # Check duration
-                if duration > max_duration:
-                    if os.path.exists(output_path):
-                        os.remove(output_path)
-                    return False, "", f"Video duration ({duration}s) exceeds maximum ({max_duration}s)"
-                
-                # Find the actual file (yt-dlp might add extension)
-                if not os.path.exists(output_path):
-                    # Try with .mp4 extension
-                    if os.path.exists(output_path + '.mp4'):
-                        output_path = output_path + '.mp4'
+            logger.info(f"Downloading video from: {url}")
+            info = ydl.extract_info(url, download=True)
+            self._cache_info(url, info)
+            duration = info.get('duration', 0)
+            
+            # Check duration
+            if duration > max_duration:
+                if os.path.exists(output_path):
+                    os.remove(output_path)
+                return False, "", f"Video duration ({duration}s) exceeds maximum ({max_duration}s)"
+            
+            # Find the actual file (yt-dlp might add extension)
+            if not os.path.exists(output_path):
+                # Try with .mp4 extension
+                if os.path.exists(output_path + '.mp4'):
+                    output_path = output_path + '.mp4'
+                else:
+                    # Find any file matching the pattern
+                    import glob
+                    pattern = output_path.replace('.mp4', '') + '*'
+                    matches = glob.glob(pattern)
+                    if matches:
+                        output_path = matches[0]
                     else:
-                        # Find any file matching the pattern
-                        import glob
-                        pattern = output_path.replace('.mp4', '') + '*'
-                        matches = glob.glob(pattern)
-                        if matches:
-                            output_path = matches[0]
-                        else:
-                            return False, "", "Downloaded file not found"
-                
-                self.downloaded_videos[url] = output_path
-                logger.info(f"Video downloaded successfully: {output_path}")
-                return True, output_path, None
+                        return False, "", "Downloaded file not found"
+            
+            self.downloaded_videos[url] = output_path
+            logger.info(f"Video downloaded successfully: {output_path}")
+            return True, output_path, None
                 
         except Exception as e:
             logger.error(f"Download error: {str(e)}")
@@ -145,30 +198,49 @@ class YouTubeService:
             Dictionary with video info
         """
         try:
-            ydl_opts = {
-                'quiet': True,
-                'no_warnings': True,
-                'socket_timeout': 30,
-            }
+            cached = self._cached_info(url)
+            if cached is not None:
+                return cached
             
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=False)
-                
-                return {
-                    "success": True,
-                    "title": info.get('title', ''),
-                    "duration": info.get('duration', 0),
-                    "uploader": info.get('uploader', ''),
-                    "upload_date": info.get('upload_date', ''),
-                    "description": info.get('description', '')[:200],  # First 200 chars
-                    "thumbnail": info.get('thumbnail', '')
-                }
+            info = self._ydl(download=False).extract_info(url, download=False)
+            return self._cache_info(url, info)
         except Exception as e:
             return {
                 "success": False,
                 "error": str(e)
             }
     
+    def _cached_info(self, url: str) -> Optional[Dict]:
+        """Video info from an earlier lookup or download of the same video, if still cached"""
+        key = _canonical_url(url)
+        with self._info_cache_lock:
+            info = self._info_cache.get(key)
+            if info is None:
+                return None
+            self._info_cache.move_to_end(key)
+        # Callers get their own copy to modify
+        return dict(info)
+    
+    def _cache_info(self, url: str, info: Dict) -> Dict:
+        """Summarize extracted yt-dlp info and cache it under the video's canonical URL"""
+        summary = {
+            "success": True,
+            "title": info.get('title', ''),
+            "duration": info.get('duration', 0),
+            "uploader": info.get('uploader', ''),
+            "upload_date": info.get('upload_date', ''),
+            "description": (info.get('description') or '')[:200],  # First 200 chars
+            "thumbnail": info.get('thumbnail', '')
+        }
+        
+        key = _canonical_url(url)
+        with self._info_cache_lock:
+            self._info_cache[key] = summary
+            self._info_cache.move_to_end(key)
+            while len(self._info_cache) > _INFO_CACHE_SIZE:
+                self._info_cache.popitem(last=False)
+        return dict(summary)
+    
     async def extract_frames(self, video_path: str, frame_interval: int = 5) -> Tuple[bool, list, Optional[str]]:
         """
         Extract frames from video at specified interval
@@ -206,33 +278,7 @@ class YouTubeService:
             Tuple of (success, list_of_frame_arrays, error_message)
         """
         try:
-            if not os.path.exists(video_path):
-                return False, [], f"Video file not found: {video_path}"
-            
-            cap = cv2.VideoCapture(video_path)
-            if not cap.isOpened():
-                return False, [], "Could not open video file"
-            
-            frames = []
-            frame_count = 0
-            
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                
-                if frame_count % frame_interval == 0:
-                    # Resize to reduce memory usage
-                    frame = cv2.resize(frame, (640, 480))
-                    frames.append(frame)
-                
-                frame_count += 1
-                
-                # Limit to reasonable number of frames for analysis
-                if len(frames) >= 100:  # Max 100 frames
-                    break
-            
-            cap.release()
+            frames = list(self.iter_frames(video_path, frame_interval))
             
             if not frames:
                 return False, [], "No frames extracted from video"
@@ -244,6 +290,68 @@ class YouTubeService:
             logger.error(f"Frame extraction error: {str(e)}")
             return False, [], str(e)
     
+    def iter_frames(self, video_path: str, frame_interval: int = 5,
+                    max_frames: int = 100) -> Iterator[np.ndarray]:
+        """
+        Lazily yield frames from video at specified interval
+        
+        Only the frame currently being decoded is held in memory, so this
+        can feed a streaming analysis pipeline directly.
+        
+        Args:
+            video_path: Path to video file
+            frame_interval: Extract every Nth frame
+            max_frames: Maximum number of frames to yield
+            
+        Yields:
+            Frames resized to 640x480
+        """
+        if not os.path.exists(video_path):
+            raise FileNotFoundError(f"Video file not found: {video_path}")
+        
+        cap = cv2.VideoCapture(video_path, cv2.CAP_FFMPEG, _CAPTURE_PARAMS)
+        if not cap.isOpened():
+            raise ValueError("Could not open video file")
+        
+        try:
+            frame_count = 0
+            yielded = 0
+            
+            while yielded < max_frames:
+                if frame_count % frame_interval == 0:
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                    
+                    # Resize to reduce memory usage
+                    yield cv2.resize(frame, (640, 480))
+                    yielded += 1
+                elif not cap.grab():
+                    # Skipped frames are decoded but never converted to BGR
+                    break
+                
+                frame_count += 1
+        finally:
+            cap.release()
+    
+    def estimate_frame_count(self, video_path: str, frame_interval: int = 5,
+                             max_frames: int = 100) -> Optional[int]:
+        """
+        Estimate how many frames iter_frames will yield, from container metadata
+        
+        Returns:
+            Estimated frame count, or None if the container does not report one
+        """
+        cap = cv2.VideoCapture(video_path)
+        try:
+            total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        finally:
+            cap.release()
+        
+        if total <= 0:
+            return None
+        return min(max_frames, -(-total // frame_interval))
+    
     def cleanup_video(self, video_path: str) -> bool:
         """
         Delete downloaded video file to save space
@@ -8,10 +8,40 @@ try:
 except ImportError:
     from config import config
 
+# SIMD base64 when installed; same API as the stdlib module
+try:
+    import pybase64 as _base64
+except ImportError:
+    _base64 = base64
+
+# libjpeg-turbo called directly; also needs the native library, not just the wheel
+try:
+    from turbojpeg import TurboJPEG, TJSAMP_420
+    _TURBO_JPEG = TurboJPEG()
+except Exception:
+    _TURBO_JPEG = None
+
+_JPEG_MAGIC = b'\xff\xd8'
+
+# Built once rather than per encoded frame
+_DEFAULT_JPEG_QUALITY = 85
+_DEFAULT_JPEG_PARAMS = [cv2.IMWRITE_JPEG_QUALITY, _DEFAULT_JPEG_QUALITY]
+
+# Only OpenCV builds compiled with CUDA (not the PyPI wheels) report devices here
+try:
+    CV2_CUDA_AVAILABLE = cv2.cuda.getCudaEnabledDeviceCount() > 0
+except (AttributeError, cv2.error):
+    CV2_CUDA_AVAILABLE = False
+
 class ImageProcessor:
     def __init__(self):
         self.max_frame_size = config.max_frame_size
         self.mobile_frame_size = config.mobile_frame_size
+        
+        # Device buffers for GPU resizing, allocated on first use and reused per frame
+        self._use_gpu_resize = CV2_CUDA_AVAILABLE and config.device == "cuda"
+        self._gpu_src = None
+        self._gpu_dst = None
     
     def decode_base64(self, image_data: str) -> np.ndarray:
         """Decode base64 image data to numpy array"""
@@ -21,38 +51,63 @@ class ImageProcessor:
                 image_data = image_data.split(',')[1]
             
             # Decode base64
-            image_bytes = base64.b64decode(image_data)
-            
-            # Convert to numpy array
-            nparr = np.frombuffer(image_bytes, np.uint8)
-            
-            # Decode image
-            frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+            image_bytes = _base64.b64decode(image_data)
             
-            if frame is None:
-                raise ValueError("Failed to decode image")
-            
-            return frame
+            return self.decode_bytes(image_bytes)
             
         except Exception as e:
             raise ValueError(f"Error decoding image: {str(e)}")
     
+    def decode_bytes(self, image_bytes) -> np.ndarray:
+        """Decode raw encoded image bytes (JPEG/PNG) to numpy array"""
+        if _TURBO_JPEG is not None and bytes(image_bytes[:2]) == _JPEG_MAGIC:
+            try:
+                # Decodes straight to BGR, like cv2.imdecode
+                return _TURBO_JPEG.decode(image_bytes)
+            except OSError:
+                raise ValueError("Failed to decode image")
+        
+        # np.frombuffer wraps bytes/memoryview without copying
+        nparr = np.frombuffer(image_bytes, np.uint8)
+        
+        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        
+        if frame is None:
+            raise ValueError("Failed to decode image")
+        
+        return frame
+    
     def encode_base64(self, frame: np.ndarray) -> str:
         """Encode numpy array to base64 string"""
         try:
-            # Encode to JPEG
-            _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-            
-            # Convert to base64
-            image_data = base64.b64encode(buffer).decode('utf-8')
-            
-            return image_data
+            return _base64.b64encode(self.encode_jpeg(frame)).decode('utf-8')
             
         except Exception as e:
             raise ValueError(f"Error encoding image: {str(e)}")
     
-    def optimize_for_device(self, frame: np.ndarray) -> np.ndarray:
-        """Optimize frame size based on device capabilities"""
+    def encode_jpeg(self, frame: np.ndarray, quality: int = _DEFAULT_JPEG_QUALITY) -> memoryview:
+        """Encode numpy array to raw JPEG bytes, as a view over the encoder's buffer"""
+        if _TURBO_JPEG is not None:
+            # 4:2:0 chroma subsampling, matching OpenCV's default output
+            return memoryview(_TURBO_JPEG.encode(
+                np.ascontiguousarray(frame), quality=quality, jpeg_subsample=TJSAMP_420
+            ))
+        
+        if quality == _DEFAULT_JPEG_QUALITY:
+            params = _DEFAULT_JPEG_PARAMS
+        else:
+            params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+        
+        success, buffer = cv2.imencode('.jpg', frame, params)
+        
+        if not success:
+            raise ValueError("Error encoding image")
+        
+        # Avoid the tobytes() copy; consumers only need a bytes-like object
+        return memoryview(buffer)
+    
+    def optimize_for_device(self, frame: np.ndarray, long_edge: Optional[int] = None) -> np.ndarray:
+        """Optimize frame size based on device capabilities, optionally capping the longer side"""
         height, width = frame.shape[:2]
         
         # Determine target size based on device
@@ -67,16 +122,32 @@ class ImageProcessor:
         scale_x = target_width / width
         scale_y = target_height / height
         scale = min(scale_x, scale_y)
+        if long_edge:
+            scale = min(scale, long_edge / max(width, height))
         
         if scale < 1.0:
             # Only downscale, never upscale
             new_width = int(width * scale)
             new_height = int(height * scale)
             
-            frame = cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+            if self._use_gpu_resize:
+                frame = self._resize_gpu(frame, (new_width, new_height))
+            else:
+                frame = cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
         
         return frame
     
+    def _resize_gpu(self, frame: np.ndarray, size: Tuple[int, int]) -> np.ndarray:
+        """Resize with cv2.cuda, uploading the full frame and downloading only the resized one"""
+        if self._gpu_src is None:
+            self._gpu_src = cv2.cuda_GpuMat()
+            self._gpu_dst = cv2.cuda_GpuMat()
+        
+        self._gpu_src.upload(frame)
+        cv2.cuda.resize(self._gpu_src, size, self._gpu_dst, interpolation=cv2.INTER_LINEAR)
+        # A fresh host array: tracking and drawing keep using it after the next frame arrives
+        return self._gpu_dst.download()
+    
     def detect_device_type(self) -> str:
         """Detect device type for optimization"""
         import torch
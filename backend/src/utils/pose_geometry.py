@@ -0,0 +1,68 @@
+"""
+Pose geometry helpers
+Scalar joint angle and distance math used by the exercise analyzers,
+JIT-compiled with numba when it is installed
+"""
+
+import math
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit, supports bare and parameterized use"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+@njit(cache=True, fastmath=True)
+def joint_angle(x1: float, y1: float, x2: float, y2: float, x3: float, y3: float) -> float:
+    """
+    Calculate the angle at (x2, y2) formed by three points
+
+    Args:
+        x1, y1: First point
+        x2, y2: Middle (joint) point
+        x3, y3: Third point
+
+    Returns:
+        Angle in degrees
+    """
+    v1x = x1 - x2
+    v1y = y1 - y2
+    v2x = x3 - x2
+    v2y = y3 - y2
+
+    # atan2(|cross|, dot) needs no square roots or division, and unlike
+    # acos(dot / norms) stays accurate near 0 and 180 degrees
+    cross = v1x * v2y - v1y * v2x
+    dot = v1x * v2x + v1y * v2y
+
+    return math.degrees(math.atan2(abs(cross), dot))
+
+
+@njit(cache=True, fastmath=True)
+def point_distance(x1: float, y1: float, x2: float, y2: float) -> float:
+    """
+    Calculate the Euclidean distance between two points
+
+    Args:
+        x1, y1: First point
+        x2, y2: Second point
+
+    Returns:
+        Distance in the points' coordinate units
+    """
+    dx = x1 - x2
+    dy = y1 - y2
+    return math.sqrt(dx * dx + dy * dy)
+
+
+def warmup() -> None:
+    """Trigger JIT compilation so the first analyzed frame doesn't pay for it"""
+    joint_angle(0.0, 1.0, 0.0, 0.0, 1.0, 0.0)
+    point_distance(0.0, 0.0, 1.0, 1.0)
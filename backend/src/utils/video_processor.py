@@ -133,8 +133,12 @@ class VideoProcessor:
         count = 0
         frame_count = 0
         
-        for frame in self.frames():
+        # grab() decodes; only kept frames pay for retrieve()'s BGR conversion
+        while self.cap.grab():
             if frame_count % interval == 0:
+                ret, frame = self.cap.retrieve()
+                if not ret:
+                    break
                 output_path = output_pattern.format(count)
                 cv2.imwrite(output_path, frame)
                 count += 1
@@ -5,7 +5,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
 import pytest
 from fastapi.testclient import TestClient
-from api.routes import app
+from api.routes import app, _pack_ws_frame, _unpack_ws_frame
 
 client = TestClient(app)
 
@@ -71,5 +71,34 @@ async def test_websocket():
     # This is a basic structure
     pass
 
+def test_ws_frame_round_trip():
+    jpeg = b'\xff\xd8\xff\xe0' + bytes(range(256)) + b'\xff\xd9'
+    message = _pack_ws_frame({'success': True, 'frame': 3, 'image': jpeg})
+    
+    metadata, image = _unpack_ws_frame(message)
+    assert metadata == {'success': True, 'frame': 3}
+    assert isinstance(image, memoryview)
+    assert bytes(image) == jpeg
+
+def test_ws_frame_without_image():
+    # A result without an image still carries its metadata, with an empty payload
+    metadata, image = _unpack_ws_frame(_pack_ws_frame({'error': 'bad frame', 'image': None}))
+    assert metadata == {'error': 'bad frame'}
+    assert bytes(image) == b''
+    
+    # Nothing but the header: no metadata and no image
+    metadata, image = _unpack_ws_frame(_pack_ws_frame({}))
+    assert metadata == {}
+    assert bytes(image) == b''
+
+def test_ws_frame_memoryview_payload():
+    jpeg = bytearray(b'\xff\xd8' + b'\x00' * 64 + b'\xff\xd9')
+    message = _pack_ws_frame({'frame': 1, 'image': memoryview(jpeg)})
+    
+    # Unpacking accepts any bytes-like message, e.g. a view into a receive buffer
+    metadata, image = _unpack_ws_frame(memoryview(message))
+    assert metadata == {'frame': 1}
+    assert bytes(image) == bytes(jpeg)
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
\ No newline at end of file
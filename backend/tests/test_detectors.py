@@ -4,7 +4,9 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
 import pytest
-from models.base_detector import BaseDetector, Detection
+from models.base_detector import BaseDetector, BatchedDetector, Detection, DetectionsBatch
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 from models.detector_factory import DetectorFactory, ModelType
 
 class MockDetector(BaseDetector):
@@ -56,6 +58,34 @@ def test_mock_detector():
     assert result.frame_shape == (480, 640)
     assert result.inference_time >= 0
 
+def test_detect_batch():
+    detector = MockDetector('test_model', device='cpu')
+    frames = [np.zeros((480, 640, 3), dtype=np.uint8), np.zeros((240, 320, 3), dtype=np.uint8)]
+    
+    results = detector.detect_batch(frames)
+    
+    assert len(results) == 2
+    assert results[0].frame_shape == (480, 640)
+    assert results[1].frame_shape == (240, 320)
+    assert len(results[1].detections) == 1
+
+def test_batched_detector_groups_concurrent_calls():
+    detector = MockDetector('test_model', device='cpu')
+    batch_sizes = []
+    detect_batch = detector.detect_batch
+    detector.detect_batch = lambda frames: batch_sizes.append(len(frames)) or detect_batch(frames)
+    
+    batched = BatchedDetector(detector, max_batch_size=4, batch_timeout=0.05)
+    frames = [np.zeros((480, 640, 3), dtype=np.uint8)] * 4
+    
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(batched.detect, frames))
+    
+    assert len(results) == 4
+    assert sum(batch_sizes) == 4
+    assert len(batch_sizes) < 4
+    assert batched.model_name == 'test_model'
+
 def test_filter_detections():
     detector = MockDetector('test_model', device='cpu', confidence_threshold=0.5)
     
@@ -74,6 +104,40 @@ def test_filter_detections():
     assert len(filtered) == 1
     assert filtered[0].class_id == 0
 
+def test_filter_detections_batch():
+    detector = MockDetector('test_model', device='cpu', confidence_threshold=0.5)
+    
+    batch = DetectionsBatch(
+        bboxes=np.array([[100, 100, 200, 200], [300, 300, 400, 400], [500, 500, 600, 600]], dtype=np.float32),
+        confidences=np.array([0.9, 0.3, 0.7], dtype=np.float32),
+        class_ids=np.array([0, 0, 1], dtype=np.int32)
+    )
+    
+    filtered = detector.filter_detections(batch)
+    assert len(filtered) == 2
+    
+    filtered = detector.filter_detections(batch, class_filter=[0])
+    detections = filtered.to_list({0: 'person', 1: 'car'})
+    assert len(detections) == 1
+    assert detections[0].class_name == 'person'
+    assert detections[0].bbox == [100, 100, 200, 200]
+
+def test_nms():
+    boxes = np.array([
+        [100, 100, 200, 200],
+        [105, 105, 205, 205],
+        [300, 300, 400, 400],
+        [102, 102, 202, 202]
+    ], dtype=np.float32)
+    scores = np.array([0.8, 0.9, 0.7, 0.6], dtype=np.float32)
+    
+    keep = BaseDetector.nms(boxes, scores, iou_threshold=0.5)
+    assert keep.tolist() == [1, 2]
+    
+    # Overlapping boxes of different classes are both kept
+    keep = BaseDetector.nms(boxes, scores, iou_threshold=0.5, class_ids=np.array([0, 0, 0, 1]))
+    assert keep.tolist() == [1, 2, 3]
+
 def test_detector_factory_get_available_models():
     models = DetectorFactory.get_available_models()
     
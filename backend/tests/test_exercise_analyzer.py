@@ -37,6 +37,30 @@ class TestPoseLandmarks:
         assert pose.confidence == 0.85
         assert len(pose.landmarks) == 2
         assert pose.landmarks[0]["name"] == "nose"
+    
+    def test_keypoints_cached(self):
+        from models.pose_estimator import PoseLandmarks
+        
+        landmarks = [
+            {"id": 11, "name": "left_shoulder", "x": 0.4, "y": 0.3, "z": 0.0, "visibility": 0.8},
+        ]
+        
+        pose = PoseLandmarks(landmarks=landmarks, confidence=0.85)
+        
+        assert pose.keypoints == {"left_shoulder": (0.4, 0.3)}
+        assert pose.keypoints is pose.keypoints
+    
+    def test_array_landmarks(self):
+        from models.pose_estimator import PoseLandmarks
+        
+        array = np.array([[0.5, 0.25, 0.0, 0.75], [0.25, 0.5, 0.0, 1.0]], dtype=np.float32)
+        
+        pose = PoseLandmarks(array, confidence=0.875, names=["nose", "left_shoulder"])
+        
+        assert pose.keypoints == {"nose": (0.5, 0.25), "left_shoulder": (0.25, 0.5)}
+        assert pose.landmarks[1] == {
+            "id": 1, "name": "left_shoulder", "x": 0.25, "y": 0.5, "z": 0.0, "visibility": 1.0
+        }
 
 
 class TestMediaPipePoseDetector:
@@ -61,6 +85,25 @@ class TestMediaPipePoseDetector:
         assert isinstance(result, float)
         assert result >= 0
     
+    def test_get_angles(self):
+        from models.pose_estimator import MediaPipePoseDetector, PoseLandmarks
+        
+        mock_detector = Mock(spec=MediaPipePoseDetector)
+        mock_detector.get_keypoints = MagicMock(return_value={
+            "left_hip": (0.0, 1.0),
+            "left_knee": (0.0, 0.0),
+            "left_ankle": (1.0, 0.0),
+        })
+        
+        angles = MediaPipePoseDetector.get_angles(
+            mock_detector, PoseLandmarks([], 1.0),
+            [("left_hip", "left_knee", "left_ankle"), ("right_hip", "right_knee", "right_ankle")]
+        )
+        
+        assert angles[0] == pytest.approx(90.0, abs=1e-3)
+        assert angles[1] == 0.0
+        mock_detector.get_keypoints.assert_called_once()
+    
     def test_get_keypoints(self):
         from models.pose_estimator import PoseLandmarks
         
@@ -82,6 +125,21 @@ class TestMediaPipePoseDetector:
         assert "left_hip" in keypoints
 
 
+class TestPoseGeometry:
+    """Test scalar pose geometry helpers"""
+    
+    def test_joint_angle(self):
+        from utils.pose_geometry import joint_angle
+        
+        assert joint_angle(0.0, 1.0, 0.0, 0.0, 1.0, 0.0) == pytest.approx(90.0, abs=1e-3)
+        assert joint_angle(0.5, 0.3, 0.5, 0.5, 0.5, 0.7) == pytest.approx(180.0, abs=0.5)
+    
+    def test_point_distance(self):
+        from utils.pose_geometry import point_distance
+        
+        assert point_distance(0.0, 0.0, 3.0, 4.0) == pytest.approx(5.0)
+
+
 class TestSquatAnalyzer:
     """Test SquatAnalyzer form analysis"""
     
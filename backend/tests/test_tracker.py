@@ -0,0 +1,48 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import pytest
+import numpy as np
+from models.base_detector import Detection
+from models.tracker import Track, TRACK_HISTORY
+
+def make_track():
+    return Track(track_id=1, start_time=0.0, last_update=0.0, color=(255, 0, 0))
+
+def add_steps(track, count):
+    # Step i moves the box i pixels right, one second apart
+    for i in range(count):
+        track.add_detection(Detection([i, 0, i + 10, 10], 0.9, 0, 'person'), float(i))
+
+def test_track_path_before_wrap():
+    track = make_track()
+    add_steps(track, 3)
+    
+    assert track.count == 3
+    assert track.path[:, 0].tolist() == [0, 1, 2]
+    assert track.current_position.bbox == [2, 0, 12, 10]
+    assert track.last_update == 2.0
+
+def test_track_path_after_wrap_is_oldest_first():
+    track = make_track()
+    add_steps(track, TRACK_HISTORY + 5)
+    
+    # The oldest five entries were overwritten
+    path = track.path
+    assert track.count == TRACK_HISTORY
+    assert len(path) == TRACK_HISTORY
+    assert path[:, 0].tolist() == list(range(5, TRACK_HISTORY + 5))
+
+def test_track_speed():
+    track = make_track()
+    assert track.speed == 0.0
+    
+    add_steps(track, TRACK_HISTORY + 5)
+    
+    # One pixel per second, also across the ring buffer's wrap point
+    assert track.speed == pytest.approx(1.0)
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,48 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import pytest
+from models.base_detector import Detection, ModelResult
+from services.tracking_service import TrackHistory, TrackingSession
+
+def test_track_history_before_wrap():
+    history = TrackHistory()
+    for i in range(3):
+        history.append([i, 0, i + 10, 10], 0.5, float(i))
+    
+    assert len(history) == 3
+    assert history.to_list() == [
+        {'timestamp': float(i), 'bbox': [i, 0, i + 10, 10], 'confidence': 0.5}
+        for i in range(3)
+    ]
+
+def test_track_history_after_wrap_is_oldest_first():
+    history = TrackHistory()
+    total = TrackHistory.CAPACITY + 7
+    for i in range(total):
+        history.append([i, 0, i + 10, 10], 0.5, float(i))
+    
+    entries = history.to_list()
+    assert len(history) == TrackHistory.CAPACITY
+    assert [entry['timestamp'] for entry in entries] == [float(i) for i in range(7, total)]
+    assert entries[0]['bbox'] == [7, 0, 17, 10]
+    assert entries[-1]['bbox'] == [total - 1, 0, total + 9, 10]
+
+def test_tracking_session_keeps_history_per_track():
+    session = TrackingSession('test_session')
+    for i in range(3):
+        detections = [
+            Detection([i, 0, i + 10, 10], 0.9, 0, 'person', track_id=1),
+            Detection([50, 50, 60, 60], 0.8, 0, 'person', track_id=2),
+            Detection([0, 0, 5, 5], 0.7, 0, 'person')  # Untracked
+        ]
+        session.add_frame_result(ModelResult(detections, 0.01, (480, 640), 'test_model'))
+    
+    assert sorted(session.track_history) == [1, 2]
+    assert [entry['bbox'][0] for entry in session.track_history[1].to_list()] == [0, 1, 2]
+    assert len(session.track_history[2]) == 3
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,96 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import asyncio
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+import numpy as np
+from services.video_analysis_service import VideoAnalysisService, _POSE_CHUNK_SIZE
+
+class FramePoseDetector:
+    """Returns a pose whose landmarks all hold the frame's id, after a random delay"""
+    
+    def __init__(self, calls, stall=0.0):
+        self.calls = calls
+        self.stall = stall
+    
+    def detect(self, frame):
+        frame_id = int(frame[0, 0, 0])
+        self.calls.append((self, frame_id))
+        time.sleep(self.stall if self.stall else random.uniform(0, 0.002))
+        self.stall = 0.0
+        return [SimpleNamespace(array=np.full((33, 4), frame_id, dtype=np.float32), confidence=0.9)]
+
+def make_frames(count):
+    # Each frame carries its id in its pixel values
+    return [np.full((8, 8, 3), i, dtype=np.uint8) for i in range(count)]
+
+def make_service(calls, workers, stall=0.0):
+    return VideoAnalysisService(
+        FramePoseDetector(calls, stall), None,
+        pose_workers=workers,
+        pose_detector_factory=lambda: FramePoseDetector(calls)
+    )
+
+def test_analyze_frames_keeps_frame_order():
+    calls = []
+    service = make_service(calls, workers=4)
+    
+    result = asyncio.run(service.analyze_frames(make_frames(200)))
+    
+    assert result.analyzed_frames == 200
+    for index, frame_analysis in enumerate(result.frame_analyses):
+        assert frame_analysis.frame_number == index
+        # Poses line up with the frame they were detected on
+        assert frame_analysis.poses[0]['landmarks'][0, 0] == index
+    assert len(calls) == 200
+
+def test_analyze_frames_hands_workers_consecutive_chunks():
+    calls = []
+    service = make_service(calls, workers=4)
+    
+    asyncio.run(service.analyze_frames(make_frames(100)))
+    
+    # Every chunk of consecutive frames runs on one detector, in frame order
+    for start in range(0, 100, _POSE_CHUNK_SIZE):
+        chunk = [(detector, frame_id) for detector, frame_id in calls
+                 if start <= frame_id < start + _POSE_CHUNK_SIZE]
+        assert len({detector for detector, _ in chunk}) == 1
+        assert [frame_id for _, frame_id in chunk] == list(range(start, min(start + _POSE_CHUNK_SIZE, 100)))
+
+def test_analyze_frames_bounds_frames_in_flight():
+    calls = []
+    # The first worker stalls on its first frame while the others keep going
+    service = make_service(calls, workers=3, stall=0.5)
+    pulled = 0
+    analyzed = 0
+    max_ahead = 0
+    lock = threading.Lock()
+    
+    def frames():
+        nonlocal pulled, max_ahead
+        for frame in make_frames(200):
+            with lock:
+                pulled += 1
+                max_ahead = max(max_ahead, pulled - analyzed)
+            yield frame
+    
+    async def callback(progress):
+        nonlocal analyzed
+        with lock:
+            analyzed = progress['current_frame']
+    
+    result = asyncio.run(service.analyze_frames(frames(), callback=callback, queue_size=8))
+    
+    assert result.analyzed_frames == 200
+    # queue_size plus a chunk per worker and one queued chunk
+    assert max_ahead <= 8 + 8 * (3 + 1)
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
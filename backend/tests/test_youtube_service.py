@@ -0,0 +1,61 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import pytest
+from services import youtube_service
+from services.youtube_service import YouTubeService, _canonical_url
+
+WATCH_URL = "https://www.youtube.com/watch?v=aclHkVaku9U"
+
+@pytest.mark.parametrize("url", [
+    "https://www.youtube.com/watch?v=aclHkVaku9U",
+    "https://youtube.com/watch?v=aclHkVaku9U",
+    "https://m.youtube.com/watch?v=aclHkVaku9U",
+    "https://www.youtube.com/watch?v=aclHkVaku9U&t=42s&list=PL123",
+    "https://www.youtube.com/watch?feature=share&v=aclHkVaku9U",
+    "https://youtu.be/aclHkVaku9U",
+    "https://youtu.be/aclHkVaku9U?si=abc&t=10",
+    "https://www.youtube.com/shorts/aclHkVaku9U",
+    "https://youtube.com/shorts/aclHkVaku9U?feature=share",
+    "  https://WWW.YouTube.com/watch?v=aclHkVaku9U  ",
+])
+def test_canonical_url_forms(url):
+    assert _canonical_url(url) == WATCH_URL
+
+def test_canonical_url_keeps_unrecognized_urls():
+    # Without a video id there is nothing to canonicalize
+    for url in ["https://www.youtube.com/channel/UC123",
+                "https://www.youtube.com/watch",
+                "https://vimeo.com/12345"]:
+        assert _canonical_url(url) == url
+
+def test_info_cache_shared_across_url_forms():
+    service = YouTubeService()
+    service._cache_info("https://youtu.be/aclHkVaku9U", {"title": "Squat", "duration": 90})
+    
+    info = service._cached_info("https://www.youtube.com/watch?v=aclHkVaku9U&t=5s")
+    assert info["title"] == "Squat"
+    assert info["duration"] == 90
+    
+    # Callers get a copy; modifying it leaves the cache untouched
+    info["title"] = "changed"
+    assert service._cached_info(WATCH_URL)["title"] == "Squat"
+    assert service._cached_info("https://youtu.be/other") is None
+
+def test_info_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(youtube_service, "_INFO_CACHE_SIZE", 2)
+    service = YouTubeService()
+    
+    service._cache_info("https://youtu.be/a", {"title": "a"})
+    service._cache_info("https://youtu.be/b", {"title": "b"})
+    service._cached_info("https://youtu.be/a")  # Now most recently used
+    service._cache_info("https://youtu.be/c", {"title": "c"})
+    
+    assert service._cached_info("https://youtu.be/b") is None
+    assert service._cached_info("https://youtu.be/a")["title"] == "a"
+    assert service._cached_info("https://youtu.be/c")["title"] == "c"
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -73,18 +73,43 @@ function YouTubeAnalyzer() {
       formData.append('url', youtubeUrl);
       formData.append('exercise_type', selectedExercise);
 
-      const response = await fetch(`${API_BASE_URL}/api/youtube/analyze`, {
+      const response = await fetch(`${API_BASE_URL}/api/youtube/analyze-stream`, {
         method: 'POST',
         body: formData
       });
 
-      const data = await response.json();
-      
-      if (data.success) {
-        setAnalysisResult(data);
-        setProgress(100);
-      } else {
+      if (!response.ok) {
+        const data = await response.json();
         setError(data.detail || data.error || 'Analysis failed');
+        return;
+      }
+
+      // Newline-delimited JSON: progress events followed by a result or error
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+
+      const handleEvent = (event) => {
+        if (event.event === 'progress') {
+          setProgress(Math.round(event.progress));
+        } else if (event.event === 'result') {
+          setAnalysisResult(event);
+          setProgress(100);
+        } else if (event.event === 'error') {
+          setError(event.detail || 'Analysis failed');
+        }
+      };
+
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
+        lines.filter((line) => line.trim()).forEach((line) => handleEvent(JSON.parse(line)));
+      }
+      if (buffer.trim()) {
+        handleEvent(JSON.parse(buffer));
       }
     } catch (err) {
       setError(`Error: ${err.message}`);
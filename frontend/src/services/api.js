@@ -24,12 +24,13 @@ export const api = {
   },
 
   // Upload image file for tracking
-  trackFile: async (file, modelType = 'yolov8', enableTracking = true) => {
+  trackFile: async (file, modelType = 'yolov8', enableTracking = true, returnImage = true) => {
     try {
       const formData = new FormData();
       formData.append('file', file);
       formData.append('model_type', modelType);
       formData.append('enable_tracking', enableTracking);
+      formData.append('return_image', returnImage);
 
       const response = await apiClient.post('/api/track/file', formData, {
         headers: {
@@ -1,3 +1,28 @@
+// Binary frame layout: <uint32 LE metadata length><UTF-8 JSON metadata><encoded image bytes>
+const HEADER_SIZE = 4;
+const textEncoder = new TextEncoder();
+const textDecoder = new TextDecoder();
+
+export const encodeFrame = (metadata, imageBytes) => {
+  const metadataBytes = textEncoder.encode(JSON.stringify(metadata || {}));
+  const image = imageBytes ? new Uint8Array(imageBytes) : new Uint8Array(0);
+  const buffer = new Uint8Array(HEADER_SIZE + metadataBytes.length + image.length);
+  new DataView(buffer.buffer).setUint32(0, metadataBytes.length, true);
+  buffer.set(metadataBytes, HEADER_SIZE);
+  buffer.set(image, HEADER_SIZE + metadataBytes.length);
+  return buffer.buffer;
+};
+
+export const decodeFrame = (arrayBuffer) => {
+  const metadataLength = new DataView(arrayBuffer).getUint32(0, true);
+  const metadataEnd = HEADER_SIZE + metadataLength;
+  const data = JSON.parse(textDecoder.decode(new Uint8Array(arrayBuffer, HEADER_SIZE, metadataLength)));
+  if (arrayBuffer.byteLength > metadataEnd) {
+    data.image = new Blob([arrayBuffer.slice(metadataEnd)], { type: 'image/jpeg' });
+  }
+  return data;
+};
+
 export class WebSocketService {
   constructor(url) {
     this.url = url || import.meta.env.VITE_WS_URL || 'ws://localhost:8000/ws/track';
@@ -12,6 +37,7 @@ export class WebSocketService {
     return new Promise((resolve, reject) => {
       try {
         this.ws = new WebSocket(this.url);
+        this.ws.binaryType = 'arraybuffer';
 
         this.ws.onopen = () => {
           console.log('WebSocket connected');
@@ -23,7 +49,7 @@ export class WebSocketService {
 
         this.ws.onmessage = (event) => {
           try {
-            const data = JSON.parse(event.data);
+            const data = decodeFrame(event.data);
             this.emit('message', data);
           } catch (error) {
             console.error('Error parsing WebSocket message:', error);
@@ -58,14 +84,16 @@ export class WebSocketService {
 
   send(data) {
     if (this.isConnected && this.ws) {
-      this.ws.send(JSON.stringify(data));
+      this.ws.send(data);
     } else {
       console.warn('WebSocket is not connected');
     }
   }
 
-  sendFrame(imageData) {
-    this.send({ image: imageData });
+  async sendFrame(image, metadata = {}) {
+    // image is a JPEG Blob (e.g. from canvas.toBlob) or an ArrayBuffer
+    const imageBytes = image instanceof Blob ? await image.arrayBuffer() : image;
+    this.send(encodeFrame(metadata, imageBytes));
   }
 
   attemptReconnect() {